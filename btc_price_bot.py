@@ -1,3 +1,5 @@
+from startup_profile import PROFILER  # isort: skip – first import, so it can time all the others
+
 import asyncio
 import logging
 from datetime import datetime, timezone
@@ -13,8 +15,32 @@ from telegram.ext import (
 )
 
 from button_router import button_click_handler
-from config import FETCH_INTERVAL, TOKEN
-from db.db import init_db
+from config import (
+    ADMIN_IDS,
+    BOT_API_BASE_URL,
+    BOT_MODE,
+    FETCH_INTERVAL,
+    METRICS_LISTEN,
+    METRICS_PORT,
+    PRICE_COMPACT_INTERVAL,
+    PRICE_STORE_FLUSH_INTERVAL,
+    TOKEN,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_QUEUE_SIZE,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+)
+from db.db import close_db, init_db, load_personal_plan_index, load_price_alert_index
+from db.price_store import init_price_db, shutdown_price_store
+from handler_timing import TimedRequest, instrument_application
+from handlers.admin import memory_command, profile_command, tasks_command
+from handlers.alerts import (
+    add_alert_conversation_handler,
+    cancel_alert,
+    open_alerts_menu,
+)
 from handlers.base_plan import open_base_sub_menu
 from handlers.core import help_command, start_command
 from handlers.currency import open_currency_menu
@@ -24,36 +50,66 @@ from handlers.personal_plan import (
     cancel_personal_plan,
     open_personal_sub_menu,
 )
-from handlers.price import get_price_command_click, refresh_price_cache
+from handlers.price import (
+    get_price_command_click,
+    get_price_snapshot,
+    refresh_price_cache,
+)
 from handlers.timezone import (
     cancel_timezone_setup,
     open_time_settings_menu,
     timezone_conversation_handler,
 )
 from handlers.upgrade import downgrade_expired_subscriptions, open_upgrade_menu
+from metrics import MetricsServer
+from services.alerts import start_price_alerts
+from services.broadcast import build_broadcast_bot
+from services.outbox import OUTBOX
 from services.payment import (
     cleanup_expired_invoices,
     handle_precheckout_query,
     handle_successful_payment,
 )
+from services.price_history import (
+    compact_price_store,
+    persist_price_ticks,
+    warm_start_price_history,
+)
 from services.scheduler import notify_subscribers
+from services.timezone_lookup import warm_timezone_finder
+from services.webhook import WebhookServer
 from util import close_http_session
 
 # Set up logging for debugging
 logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO)
 
 
-async def main():
-    # init DB
-    await init_db()
+async def init_storage() -> None:
+    with PROFILER.step("init_db"):
+        await init_db()
+    with PROFILER.step("load personal plan index"):
+        await load_personal_plan_index()
+    with PROFILER.step("load price alert index"):
+        await load_price_alert_index()
+    with PROFILER.step("init price history db"):
+        await init_price_db()
+    with PROFILER.step("warm price history"):
+        await warm_start_price_history()
+
+
+def build_application(token: str) -> Application:
     # Create application instance with the bot token
-    app = (
+    builder = (
         Application.builder()
-        .token(TOKEN)
+        .token(token)
         .rate_limiter(AIORateLimiter(overall_max_rate=30, max_retries=3))
-        .build()
+        .request(TimedRequest(connection_pool_size=256))  # books Bot API time on handler spans
     )
+    if BOT_API_BASE_URL:
+        builder = builder.base_url(BOT_API_BASE_URL)
+    app = builder.build()
     app.job_queue.run_once(cleanup_expired_invoices, when=0)
+    app.job_queue.run_once(warm_timezone_finder, when=0)
 
     # Register command handlers
     app.add_handler(CommandHandler("start", start_command))
@@ -63,15 +119,25 @@ async def main():
 
     app.add_handler(CommandHandler("base", open_base_sub_menu))
     app.add_handler(CommandHandler("personal", open_personal_sub_menu))
+    app.add_handler(CommandHandler("alerts", open_alerts_menu))
 
     app.add_handler(CommandHandler("upgrade", open_upgrade_menu))
     app.add_handler(CommandHandler("timezone", open_time_settings_menu))
 
     app.add_handler(CommandHandler("donate", open_donate_menu))
 
+    # Diagnostics – silently ignored for everyone not in ADMIN_IDS
+    admins = filters.User(user_id=ADMIN_IDS)
+    app.add_handler(CommandHandler("profile", profile_command, filters=admins))
+    app.add_handler(CommandHandler("memory", memory_command, filters=admins))
+    app.add_handler(CommandHandler("tasks", tasks_command, filters=admins))
+
     app.add_handler(add_personal_conversation_handler)
     app.add_handler(CallbackQueryHandler(cancel_personal_plan, pattern=r"^cancel_personal_plan_\d+$"))
 
+    app.add_handler(add_alert_conversation_handler)
+    app.add_handler(CallbackQueryHandler(cancel_alert, pattern=r"^cancel_alert_\d+$"))
+
     app.add_handler(timezone_conversation_handler)
     app.add_handler(MessageHandler(filters.Regex("^❌ Cancel$"), cancel_timezone_setup))
 
@@ -79,31 +145,76 @@ async def main():
     app.add_handler(MessageHandler(filters.SUCCESSFUL_PAYMENT, handle_successful_payment))
 
     app.add_handler(CallbackQueryHandler(button_click_handler))
+    instrument_application(app, skip=[button_click_handler])  # the router times itself per callback key
+    return app
+
+
+def schedule_jobs(app: Application) -> None:
+    delay_subs = (60 - datetime.now(timezone.utc).second) % 60
+    app.job_queue.run_repeating(notify_subscribers,
+                                interval=60, first=delay_subs,
+                                job_kwargs={"misfire_grace_time": 5})
+    delay_cache = (delay_subs + 30) % 60
+    app.job_queue.run_repeating(refresh_price_cache,
+                                interval=FETCH_INTERVAL, first=delay_cache,
+                                job_kwargs={"misfire_grace_time": 5})
+
+    app.job_queue.run_repeating(persist_price_ticks,
+                                interval=PRICE_STORE_FLUSH_INTERVAL, first=PRICE_STORE_FLUSH_INTERVAL)
+    app.job_queue.run_repeating(compact_price_store,
+                                interval=PRICE_COMPACT_INTERVAL, first=60)
 
-    # Start polling for messages
-    logging.info("🚀 Bot is running... Press Ctrl+C to stop.")
-    async with app:
-        await app.start()
-        await app.updater.start_polling(drop_pending_updates=True)
-
-        delay_subs = (60 - datetime.now(timezone.utc).second) % 60
-        app.job_queue.run_repeating(notify_subscribers,
-                                    interval=60, first=delay_subs,
-                                    job_kwargs={"misfire_grace_time": 5})
-        delay_cache = (delay_subs + 30) % 60
-        app.job_queue.run_repeating(refresh_price_cache,
-                                    interval=FETCH_INTERVAL, first=delay_cache,
-                                    job_kwargs={"misfire_grace_time": 5})
-
-        # Every 8 hours
-        app.job_queue.run_repeating(downgrade_expired_subscriptions,
-                                    interval=8 * 3600, first=5,
-                                    job_kwargs={"misfire_grace_time": 5})
+    # Every 8 hours
+    app.job_queue.run_repeating(downgrade_expired_subscriptions,
+                                interval=8 * 3600, first=5,
+                                job_kwargs={"misfire_grace_time": 5})
+
+
+async def main():
+    if BOT_MODE == "webhook" and not WEBHOOK_SECRET:
+        raise SystemExit("BOT_MODE=webhook needs WEBHOOK_SECRET – refusing to accept unauthenticated updates")
+    # init DB
+    await init_storage()
+    with PROFILER.step("register handlers"):
+        app = build_application(TOKEN)
+    # Fan-outs (outbox, price alerts) bypass the app's rate limiter – BroadcastEngine paces them itself
+    broadcast_bot = build_broadcast_bot(TOKEN, BOT_API_BASE_URL)
+
+    webhook = None
+    metrics_server = MetricsServer() if METRICS_PORT else None
+    logging.info("🚀 Bot is running (%s)... Press Ctrl+C to stop.", BOT_MODE)
+    async with app, broadcast_bot:
+        with PROFILER.step(f"start app + {BOT_MODE}"):
+            await app.start()
+            if BOT_MODE == "webhook":
+                webhook = WebhookServer(app, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_QUEUE_SIZE)
+                await webhook.start(WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_URL)
+            else:
+                # Start polling for messages
+                await app.updater.start_polling(drop_pending_updates=True)
+        if metrics_server is not None:
+            try:
+                await metrics_server.start(METRICS_LISTEN, METRICS_PORT)
+            except OSError as e:  # e.g. port taken – the bot runs fine without metrics
+                logging.error("Metrics endpoint disabled, cannot listen on %s:%s: %s", METRICS_LISTEN, METRICS_PORT, e)
+        OUTBOX.start(broadcast_bot)  # delivers whatever was left pending before the restart
+        start_price_alerts(broadcast_bot)
+        schedule_jobs(app)
+        with PROFILER.step("first price fetch"):
+            await get_price_snapshot()  # users right after a restart get a cached quote
+        PROFILER.finish()
         try:
             # This keeps the loop alive forever
             await asyncio.Event().wait()
         finally:
+            if webhook is not None:
+                await webhook.stop()
+            if metrics_server is not None:
+                await metrics_server.stop()
+            await OUTBOX.stop()
             await close_http_session()
+            await shutdown_price_store()
+            await close_db()
 
 
 if __name__ == "__main__":
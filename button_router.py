@@ -2,6 +2,8 @@ from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import CallbackContext
 
 from config import CURRENCIES, PREDEFINED_INTERVALS, PROVIDERS, TierConvertFromNumber
+from handler_timing import handler_key, handler_span
+from handlers.alerts import open_alerts_menu, view_alerts
 from handlers.base_plan import (
     confirm_base_sub,
     confirm_unbase_sub,
@@ -44,6 +46,8 @@ def initialize_button_handlers():
         "open_personal_sub_menu": open_personal_sub_menu,
         "view_personal": view_personal_plans,
         "open_cancel_personal_menu": open_cancel_personal_menu,
+        "open_alerts_menu": open_alerts_menu,
+        "view_alerts": view_alerts,
         "open_time_settings_menu": open_time_settings_menu,
         "view_time_settings": view_time_settings,
         "open_upgrade_menu": open_upgrade_menu,
@@ -78,15 +82,16 @@ BUTTON_HANDLERS = initialize_button_handlers()
 
 async def button_click_handler(update: Update, context: CallbackContext) -> None:
     query = update.callback_query
-    await query.answer()  # Acknowledge button press to Telegram
+    with handler_span("button:" + handler_key(query.data, BUTTON_HANDLERS)):
+        await query.answer()  # Acknowledge button press to Telegram
 
-    handler = BUTTON_HANDLERS.get(query.data)
-    if handler:
-        await handler(update, context)
-    else:
-        await send_or_edit(update,
-                           "❓ Unknown action.",
-                           reply_markup=InlineKeyboardMarkup([
-                               [InlineKeyboardButton("🏠 Main Menu", callback_data="open_main_menu")]
-                           ])
-                           )
+        handler = BUTTON_HANDLERS.get(query.data)
+        if handler:
+            await handler(update, context)
+        else:
+            await send_or_edit(update,
+                               "❓ Unknown action.",
+                               reply_markup=InlineKeyboardMarkup([
+                                   [InlineKeyboardButton("🏠 Main Menu", callback_data="open_main_menu")]
+                               ])
+                               )
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta, timezone
+
+
+class Clock:
+    """
+    UTC wall clock for everything time-dependent: the scheduler, plan index and outbox, but also
+    price cache ages, message timestamps, invoice and subscription expiry and price history.
+
+    Normally just datetime.now(); tools can freeze it and advance it by hand to replay
+    a day of scheduler ticks in seconds (see tools/simulate_scheduler.py).
+    """
+
+    def __init__(self):
+        self._frozen: datetime | None = None
+
+    def now(self) -> datetime:
+        return self._frozen if self._frozen is not None else datetime.now(timezone.utc)
+
+    def time(self) -> float:
+        return self.now().timestamp()
+
+    def freeze(self, at: datetime) -> None:
+        self._frozen = at
+
+    def advance(self, seconds: float) -> None:
+        if self._frozen is None:
+            raise RuntimeError("Only a frozen clock can be advanced")
+        self._frozen += timedelta(seconds=seconds)
+
+    def unfreeze(self) -> None:
+        self._frozen = None
+
+
+CLOCK = Clock()
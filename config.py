@@ -16,12 +16,92 @@ INTERNATIONAL_REAL_TOKEN = os.getenv("AMMER_PAY_REAL_TOKEN")
 
 # List of currencies we will support
 CURRENCIES = ["USD", "RUB", "EUR", "CAD", "GBP", "CNY"]
-BLOCKCHAIN_API = "https://blockchain.info/ticker"
-COINGECKO_API = f"https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies={','.join(CURRENCIES)}"
+# Price sources – URLs can be pointed at local stub servers for tests
+BLOCKCHAIN_API = os.getenv("BLOCKCHAIN_API", "https://blockchain.info/ticker")
+COINGECKO_API = os.getenv(
+    "COINGECKO_API",
+    f"https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies={','.join(CURRENCIES)}",
+)
+PRICE_SOURCE_MODE = os.getenv("PRICE_SOURCE_MODE", "first")  # "first" (hedged, fastest wins) or "quorum"
+PRICE_HEDGE_DELAY = 0.5  # seconds to wait on a source before also asking the next one (until stats exist)
+PRICE_QUORUM = 2  # "quorum" mode: sources that must agree on a currency's price
+PRICE_MAX_DEVIATION = 0.02  # "quorum" mode: max relative distance from the median to count as agreeing
+PRICE_SOURCE_STATS_WINDOW = 100  # latency samples kept per source
 PREDEFINED_INTERVALS = [15, 30, 60, 240, 1440]  # In minutes
 FETCH_INTERVAL = 60  # seconds
+PRICE_MAX_STALENESS = 600  # seconds; older cached prices are shown with a "stale data" warning
+PRICE_HISTORY_SIZE = 2880  # ticks kept in memory per currency (≥ 24 h at one fetch per minute)
+PRICE_STORE_FLUSH_INTERVAL = 300  # seconds between batched writes of fetched ticks to the history DB
+PRICE_COMPACT_INTERVAL = 900  # seconds between roll-ups of the history DB
+# How long each history resolution (bucket width in seconds) is kept; None = forever
+PRICE_RETENTION = {
+    60: 2 * 86400,
+    300: 30 * 86400,
+    3600: 365 * 86400,
+    86400: None,
+}
 EXPIRY_SECONDS = 300
 
+# Scheduled broadcasts (Telegram allows ~30 msg/s per bot and ~1 msg/s per chat)
+BROADCAST_WORKERS = 16
+BROADCAST_RATE = 25  # messages per second, leaves headroom for interactive replies
+BROADCAST_CHAT_INTERVAL = 1.0  # seconds between two messages to the same chat
+BROADCAST_QUEUE_SIZE = 1000  # pending messages held in memory per broadcast
+BROADCAST_MAX_ATTEMPTS = 5
+BROADCAST_REPORT_INTERVAL = 10  # seconds between progress logs of a long broadcast
+
+USER_CACHE_SIZE = 10_000  # users kept per settings cache (currencies, timezone, tier)
+TZ_GRID_DEGREES = 0.01  # shared locations are snapped to this grid (~1 km) before the timezone lookup
+TZ_LOOKUP_CACHE_SIZE = 4096  # grid cells whose timezone is kept in memory
+
+# Group commit (opt in with DB_GROUP_COMMIT=1): writes are batched into one transaction per window /
+# per N statements. Each write then returns only after its batch commits, and a lock error retries the batch
+DB_GROUP_COMMIT = os.getenv("DB_GROUP_COMMIT", "0") == "1"
+DB_COMMIT_WINDOW = 0.005  # seconds a batch stays open for more writes
+DB_COMMIT_MAX_BATCH = 200  # statements per transaction
+# Read-only connections for SELECT helpers (WAL lets them run beside the single writer)
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "4"))
+DB_READ_PRAGMAS = {
+    "query_only": "ON",
+    "busy_timeout": 2000,
+    "cache_size": -16000,  # KiB per connection
+    "temp_store": "MEMORY",
+}
+
+# Scheduled notifications go through a durable outbox table (at-least-once delivery)
+OUTBOX_BATCH_SIZE = 5000  # pending rows claimed per drain round
+OUTBOX_POLL_INTERVAL = 5  # seconds between drain rounds when nothing wakes the drainer
+OUTBOX_MAX_ATTEMPTS = 5  # delivery attempts (each one a full broadcast-engine retry cycle) before giving up
+OUTBOX_CLAIM_TIMEOUT = 600  # seconds a claimed batch stays invisible to other drainers (> one drain round)
+OUTBOX_RETRY_DELAY = 30  # seconds before the first re-attempt, doubled per attempt
+OUTBOX_CATCHUP_WINDOW = 30  # minutes: missed ticks this recent are replayed, older pending rows expire
+OUTBOX_RETENTION = 2 * 86400  # seconds finished rows are kept for inspection
+
+# Telegram user ids allowed to use the diagnostics commands (/profile, /memory, /tasks), comma-separated
+ADMIN_IDS = frozenset(int(uid) for uid in os.getenv("ADMIN_IDS", "").split(",") if uid.strip())
+PROFILE_DEFAULT_SECONDS = 30
+PROFILE_MAX_SECONDS = 300
+
+# Handler timing: calls slower than this are logged; this share of them also logs a step-by-step trace
+HANDLER_SLOW_THRESHOLD = float(os.getenv("HANDLER_SLOW_THRESHOLD", "0.5"))  # seconds
+HANDLER_TRACE_SAMPLE = 0.1
+
+# Prometheus metrics (GET /metrics); off unless METRICS_PORT is set
+METRICS_LISTEN = os.getenv("METRICS_LISTEN", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Bot API endpoint; point it at tools/fake_bot_api.py (e.g. http://127.0.0.1:8081/bot) for load tests
+BOT_API_BASE_URL = os.getenv("BOT_API_BASE_URL")  # None = api.telegram.org
+
+# How updates arrive: "polling" (default) or "webhook" (embedded aiohttp server)
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # public base URL; set_webhook is skipped when empty
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "127.0.0.1")  # behind a reverse proxy; 0.0.0.0 to expose
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")  # required in webhook mode; matched to X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_QUEUE_SIZE = 1000  # accepted-but-not-yet-decoded updates; beyond this Telegram gets a 503
+
 
 @dataclass(frozen=True)
 class Provider:
@@ -43,6 +123,7 @@ class Tier:
     mx_personal_plans: int
     mn_interval: int
     emoji: str
+    mx_price_alerts: int
 
 
 class TierConvertFromNumber(IntEnum):
@@ -59,7 +140,8 @@ FREE_TIER = Tier(
     },
     mx_personal_plans=1,
     mn_interval=5,
-    emoji=""
+    emoji="",
+    mx_price_alerts=1
 )
 
 PRO_TIER = Tier(
@@ -70,7 +152,8 @@ PRO_TIER = Tier(
     },
     mx_personal_plans=3,
     mn_interval=1,
-    emoji="⚡"
+    emoji="⚡",
+    mx_price_alerts=5
 )
 ULTRA_TIER = Tier(name="Ultra",
                   price={
@@ -79,7 +162,8 @@ ULTRA_TIER = Tier(name="Ultra",
                   },
                   mx_personal_plans=5,
                   mn_interval=1,
-                  emoji="🚀"
+                  emoji="🚀",
+                  mx_price_alerts=20
                   )
 
 TIERS: dict[TierConvertFromNumber, Tier] = {
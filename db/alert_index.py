@@ -0,0 +1,73 @@
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple
+
+
+class PriceAlert(NamedTuple):
+    id: int
+    user_id: int
+    currency: str
+    threshold: float
+
+
+class AlertIndex:
+    """
+    In-memory index of price alerts: per currency, thresholds kept sorted in a flat list with a
+    parallel list of alert ids. Alerts crossed by a price move are one contiguous slice found by
+    bisecting between the previous and the current price, so a tick never loops over every alert.
+    """
+
+    def __init__(self):
+        self._thresholds: dict[str, list[float]] = {}
+        self._ids: dict[str, list[int]] = {}
+        self._alerts: dict[int, PriceAlert] = {}
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def clear(self) -> None:
+        self._thresholds.clear()
+        self._ids.clear()
+        self._alerts.clear()
+
+    def get(self, alert_id: int) -> PriceAlert | None:
+        return self._alerts.get(alert_id)
+
+    def add(self, alert: PriceAlert) -> None:
+        thresholds = self._thresholds.setdefault(alert.currency, [])
+        ids = self._ids.setdefault(alert.currency, [])
+        pos = bisect_right(thresholds, alert.threshold)
+        thresholds.insert(pos, alert.threshold)
+        ids.insert(pos, alert.id)
+        self._alerts[alert.id] = alert
+
+    def remove(self, alert_id: int) -> None:
+        alert = self._alerts.pop(alert_id, None)
+        if alert is None:
+            return
+        thresholds, ids = self._thresholds[alert.currency], self._ids[alert.currency]
+        pos = bisect_left(thresholds, alert.threshold)
+        while ids[pos] != alert_id:  # equal thresholds sit next to each other
+            pos += 1
+        del thresholds[pos], ids[pos]
+
+    def pop_crossed(self, currency: str, prev: float, current: float) -> list[PriceAlert]:
+        """
+        Remove and return alerts whose threshold lies in (prev, current] for a rise
+        or in [current, prev) for a fall.
+        """
+        thresholds = self._thresholds.get(currency)
+        if not thresholds or prev == current:
+            return []
+        if current > prev:
+            lo, hi = bisect_right(thresholds, prev), bisect_right(thresholds, current)
+        else:
+            lo, hi = bisect_left(thresholds, current), bisect_left(thresholds, prev)
+        if lo >= hi:
+            return []
+        ids = self._ids[currency]
+        crossed = [self._alerts.pop(alert_id) for alert_id in ids[lo:hi]]
+        del thresholds[lo:hi], ids[lo:hi]
+        return crossed
+
+
+ALERT_INDEX = AlertIndex()
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from config import USER_CACHE_SIZE
+from metrics import METRICS
+
+MISSING = object()  # "not cached" marker – None is a valid cached value (no row)
+
+
+class LRUCache:
+    """
+    Size-capped LRU used as a read-through cache in front of SQLite.
+
+    Readers call fill() with the token taken *before* their query; if a writer touched the
+    cache in the meantime the (possibly stale) value is not stored.
+    """
+
+    def __init__(self, name: str, maxsize: int = USER_CACHE_SIZE):
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._writes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def token(self) -> int:
+        return self._writes
+
+    def fill(self, key: Hashable, value: Any, token: int) -> None:
+        """Store a value read from the DB, unless a write happened since token()."""
+        if token == self._writes:
+            self._store(key, value)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Write-through from a DB writer."""
+        self._writes += 1
+        self._store(key, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._writes += 1
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._writes += 1
+        self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+CURRENCY_CACHE = LRUCache("currencies")
+TIMEZONE_CACHE = LRUCache("timezone")
+TIER_CACHE = LRUCache("tier")
+
+USER_SETTINGS_CACHES = (CURRENCY_CACHE, TIMEZONE_CACHE, TIER_CACHE)
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    """Hit/miss counters and sizes of the user-settings caches."""
+    return {cache.name: cache.stats() for cache in USER_SETTINGS_CACHES}
+
+
+METRICS.callback(
+    "settings_cache_lookups_total", "User-settings cache lookups by result",
+    lambda: {(name, result): stats[result] for name, stats in cache_stats().items() for result in ("hits", "misses")},
+    ("cache", "result"), kind="counter",
+)
+METRICS.callback("settings_cache_entries", "User-settings cache sizes",
+                 lambda: {name: stats["size"] for name, stats in cache_stats().items()}, ("cache",))
@@ -1,16 +1,37 @@
 import asyncio
 import logging
+from dataclasses import dataclass
 from pathlib import Path
+from time import perf_counter
+from typing import Iterable, NamedTuple
 
 import aiosqlite
 
-from config import TierConvertFromNumber
+from clock import CLOCK
+from config import (
+    DB_COMMIT_MAX_BATCH,
+    DB_COMMIT_WINDOW,
+    DB_GROUP_COMMIT,
+    DB_READ_POOL_SIZE,
+    DB_READ_PRAGMAS,
+    TierConvertFromNumber,
+)
+from db.alert_index import ALERT_INDEX, PriceAlert
+from db.cache import CURRENCY_CACHE, MISSING, TIER_CACHE, TIMEZONE_CACHE
+from db.migrations import apply_migrations, check_query_plans
+from db.plan_index import PLAN_INDEX, epoch_minute
+from db.query_metrics import query_label
+from db.read_pool import ReadPool
+from db.writer import GroupCommitWriter
+from handler_timing import account
+from metrics import DB_COMMIT_SECONDS, DB_QUERY_SECONDS, METRICS
 
 DB_PATH = Path("db", "database_files", "btc_bot_data.db")
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)  # auto-create folders
 DB_NAME = str(DB_PATH)
 
 MAX_RETRIES = 2  # 1 original try + 1 retry
+BULK_CHUNK_SIZE = 500  # ids per IN (...) query, well below SQLite's bound-variable limit
 LOCK_RETRY_DELAY = 0.05  # seconds (50ms)
 
 _DB: aiosqlite.Connection | None = None
@@ -18,6 +39,7 @@ _LOCK = asyncio.Lock()  # to serialise open/close
 
 
 async def get_db() -> aiosqlite.Connection:
+    """The single writer connection (init, writes and the group-commit batches)."""
     global _DB
     async with _LOCK:
         if _DB is None:  # closed / crashed
@@ -27,101 +49,73 @@ async def get_db() -> aiosqlite.Connection:
         return _DB
 
 
-async def init_db():
-    db = await get_db()
+_WRITER = GroupCommitWriter(
+    get_db, window=DB_COMMIT_WINDOW, max_batch=DB_COMMIT_MAX_BATCH,
+    max_retries=MAX_RETRIES, retry_delay=LOCK_RETRY_DELAY,
+) if DB_GROUP_COMMIT else None
 
-    await db.execute(
-        """
-            CREATE TABLE IF NOT EXISTS currency_preferences (
-                user_id INTEGER PRIMARY KEY,
-                currencies TEXT  -- Stored as comma-separated values
-            )
-        """
-    )
 
-    await db.execute(
-        """
-                CREATE TABLE IF NOT EXISTS base_subscribers (
-                    user_id INTEGER,
-                    interval_minutes INTEGER,
-                    PRIMARY KEY(user_id, interval_minutes)
-                )
-            """
-    )
+_READ_POOL = ReadPool(lambda: DB_NAME, size=DB_READ_POOL_SIZE, pragmas=DB_READ_PRAGMAS)
 
-    await db.execute(
-        """
-                CREATE TABLE IF NOT EXISTS personal_subscribers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    interval_minutes INTEGER NOT NULL,
-                    first_fire_time TIMESTAMP NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """
-    )
+if _WRITER is not None:
+    METRICS.callback("db_write_batches_total", "Group commit transactions", lambda: _WRITER.batches, kind="counter")
+    METRICS.callback("db_write_statements_total", "Statements written through group commit",
+                     lambda: _WRITER.statements, kind="counter")
 
-    await db.execute(
-        """
-                CREATE TABLE IF NOT EXISTS user_time_settings (
-                    user_id INTEGER PRIMARY KEY,
-                    timezone TEXT NULL,
-                    offset_minutes INTEGER NOT NULL DEFAULT 0,
-                    tz_method TEXT NULL,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """
-    )
 
-    await db.execute(
-        """
-                CREATE TABLE IF NOT EXISTS user_subscriptions (
-                    user_id INTEGER PRIMARY KEY,
-                    tier INTEGER DEFAULT 0,
-                    subscription_end DATETIME,        -- if using expiring subscriptions
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """
-    )
+def read_db():
+    """`async with read_db() as db:` – a pooled read-only connection for SELECTs."""
+    return _READ_POOL.connection()
 
-    await db.execute(
-        """
-                CREATE TABLE IF NOT EXISTS payments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    operation_type TEXT NOT NULL,
-                    tier INTEGER NOT NULL,
-                    currency TEXT NOT NULL,
-                    amount INTEGER NOT NULL,  -- in cents/kopecks
-                    provider TEXT NOT NULL,
-                    telegram_payment_charge_id TEXT UNIQUE NOT NULL,
-                    provider_payment_charge_id TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """
-    )
 
-    await db.execute(
-        """
-        CREATE TABLE IF NOT EXISTS invoices (
-            message_id INTEGER PRIMARY KEY,
-            chat_id INTEGER NOT NULL,
-            created_at INTEGER NOT NULL
-        )
-    """
-    )
-    await db.commit()
+async def close_db() -> None:
+    """Commit queued writes and close the writer and all pooled readers."""
+    global _DB
+    if _WRITER is not None:
+        await _WRITER.close()
+    await _READ_POOL.close()
+    async with _LOCK:
+        if _DB is not None:
+            await _DB.close()
+            _DB = None
+
+
+async def init_db():
+    db = await get_db()
+    await apply_migrations(db)
 
+    full_scans = await check_query_plans(db)
+    for name, plan in full_scans.items():
+        logging.warning("⚠️ Hot query %s does not use an index: %s", name, plan)
 
-async def execute_write(db: aiosqlite.Connection, sql: str, params: tuple):
+
+async def execute_write(db: aiosqlite.Connection, sql: str, params: tuple, fetch: bool = False) -> int | list | None:
     """
     Execute a single write with WAL + retry‑on‑lock.
+    Returns the rowid of the last inserted row (if any), or with `fetch` the statement's rows
+    (for UPDATE ... RETURNING).
+    With DB_GROUP_COMMIT the write joins the current batch and returns once that batch is committed.
     """
+    started = perf_counter()
+    try:
+        return await _execute_write(db, sql, params, fetch)
+    finally:
+        account("db", perf_counter() - started, query_label(sql))
+
+
+async def _execute_write(db: aiosqlite.Connection, sql: str, params: tuple, fetch: bool) -> int | list | None:
+    if _WRITER is not None:
+        return await _WRITER.execute(sql, params, fetch)
     for attempt in range(MAX_RETRIES):
         try:
-            await db.execute(sql, params)
+            started = perf_counter()
+            cursor = await db.execute(sql, params)
+            rows = await cursor.fetchall() if fetch else None
             await db.commit()
-            return
+            elapsed = perf_counter() - started
+            DB_COMMIT_SECONDS.observe(elapsed)
+            DB_QUERY_SECONDS.labels(query_label(sql)).observe(elapsed)
+            return rows if fetch else cursor.lastrowid
         except aiosqlite.OperationalError as e:
             if "database is locked" in str(e).lower() and attempt + 1 < MAX_RETRIES:
                 logging.warning("Retrying DB write after lock")
@@ -143,18 +137,22 @@ async def save_user_currencies(user_id: int, currencies: list[str]):
     currency_str = ",".join(currencies)
 
     await execute_write(db, SAVE_USER_CUR, (user_id, currency_str))
+    CURRENCY_CACHE.set(user_id, tuple(currencies) or None)
 
 
 async def load_user_currencies(user_id: int) -> list[str] | None:
-    db = await get_db()
+    cached = CURRENCY_CACHE.get(user_id)
+    if cached is not MISSING:
+        return list(cached) if cached else None  # callers mutate the list
 
-    async with db.execute(
+    token = CURRENCY_CACHE.token()
+    async with read_db() as db, db.execute(
         "SELECT currencies FROM currency_preferences WHERE user_id = ?", (user_id,)
     ) as cursor:
         row = await cursor.fetchone()
-        if row and row[0]:
-            return row[0].split(",")
-        return None
+    currencies = row[0].split(",") if row and row[0] else None
+    CURRENCY_CACHE.fill(user_id, tuple(currencies) if currencies else None, token)
+    return currencies
 
 
 CLEAR_USER_CUR = "DELETE FROM currency_preferences WHERE user_id = ?"
@@ -163,6 +161,7 @@ CLEAR_USER_CUR = "DELETE FROM currency_preferences WHERE user_id = ?"
 async def clear_user_currencies(user_id: int):
     db = await get_db()
     await execute_write(db, CLEAR_USER_CUR, (user_id,))
+    CURRENCY_CACHE.set(user_id, None)
 
 
 ADD_BASE_SUB = """
@@ -186,9 +185,7 @@ async def remove_base_subscription(user_id: int, interval: int):
 
 
 async def get_base_subscribers(interval: int) -> list[int]:
-    db = await get_db()
-
-    async with db.execute(
+    async with read_db() as db, db.execute(
         "SELECT user_id FROM base_subscribers WHERE interval_minutes = ?", (interval,)
     ) as cursor:
         rows = await cursor.fetchall()
@@ -197,42 +194,61 @@ async def get_base_subscribers(interval: int) -> list[int]:
 
 async def get_user_base_subscriptions(user_id: int) -> list[int]:
     """Returns a list of intervals the user is subscribed to."""
-    db = await get_db()
-
-    async with db.execute(
+    async with read_db() as db, db.execute(
         "SELECT interval_minutes FROM base_subscribers WHERE user_id = ?", (user_id,)
     ) as cursor:
         rows = await cursor.fetchall()
         return [row[0] for row in rows]
 
 
-async def get_personal_plans(user_id: int) -> list[tuple[int, int, str]]:
-    """
-    Returns a list of tuples (interval_minutes, first_fire_time) for the given user.
-    """
-    db = await get_db()
+class PersonalPlan(NamedTuple):
+    id: int
+    user_id: int
+    interval: int  # minutes
+    first_fire_min: int  # minutes since the Unix epoch (UTC)
+
+
+SELECT_PERSONAL = "SELECT id, user_id, interval_minutes, first_fire_min FROM personal_subscribers"
 
-    async with db.execute(
-        "SELECT id, interval_minutes, first_fire_time FROM personal_subscribers WHERE user_id = ? ORDER BY created_at",
-        (user_id,),
+
+async def get_personal_plans(user_id: int) -> list[PersonalPlan]:
+    """Returns the user's personal plans, oldest first."""
+    async with read_db() as db, db.execute(
+        f"{SELECT_PERSONAL} WHERE user_id = ? ORDER BY created_at", (user_id,)
     ) as cursor:
-        return await cursor.fetchall()
+        return [PersonalPlan(*row) for row in await cursor.fetchall()]
+
+
+DUE_PERSONAL = """
+SELECT DISTINCT user_id FROM personal_subscribers
+WHERE first_fire_min <= ?1 AND (?1 - first_fire_min) % interval_minutes = 0
+"""
+
+
+async def get_due_personal_subscribers(now_min: int) -> list[int]:
+    """
+    Users with a personal plan firing at now_min, selected in SQL with integer arithmetic.
+    The scheduler uses the in-memory PLAN_INDEX; this is the stateless equivalent (full scan).
+    """
+    async with read_db() as db, db.execute(DUE_PERSONAL, (now_min,)) as cursor:
+        return [row[0] for row in await cursor.fetchall()]
 
 
 ADD_PERSONAL = """
-INSERT INTO personal_subscribers (user_id, interval_minutes, first_fire_time)
+INSERT INTO personal_subscribers (user_id, interval_minutes, first_fire_min)
 VALUES (?, ?, ?)
 """
 
 
-async def add_personal_plan(user_id: int, interval: int, first_fire_time: str) -> None:
+async def add_personal_plan(user_id: int, interval: int, first_fire_min: int) -> None:
     db = await get_db()  # 🟢 shared conn
-    await execute_write(db, ADD_PERSONAL, (user_id, interval, first_fire_time))
+    plan_id = await execute_write(db, ADD_PERSONAL, (user_id, interval, first_fire_min))
+    now_min = epoch_minute(CLOCK.now())
+    PLAN_INDEX.add(plan_id, user_id, interval, first_fire_min, now_min)
 
 
 async def count_personal_plans(user_id: int) -> int:
-    db = await get_db()
-    async with db.execute(
+    async with read_db() as db, db.execute(
         "SELECT COUNT(*) FROM personal_subscribers WHERE user_id = ?", (user_id,)
     ) as cur:
         row = await cur.fetchone()
@@ -240,13 +256,18 @@ async def count_personal_plans(user_id: int) -> int:
 
 
 async def get_user_tier(user_id: int) -> int:
-    db = await get_db()
+    cached = TIER_CACHE.get(user_id)
+    if cached is not MISSING:
+        return cached
 
-    async with db.execute(
+    token = TIER_CACHE.token()
+    async with read_db() as db, db.execute(
         "SELECT tier FROM user_subscriptions WHERE user_id = ?", (user_id,)
     ) as cursor:
         row = await cursor.fetchone()
-        return row[0] if row else 0
+    tier = row[0] if row else 0
+    TIER_CACHE.fill(user_id, tier, token)
+    return tier
 
 
 UPDATE_TIER = """
@@ -259,20 +280,25 @@ ON CONFLICT(user_id) DO UPDATE SET
 """
 
 
-async def update_user_tier(user_id: int, new_tier: TierConvertFromNumber, expiry_date: str | None):
+async def update_user_tier(user_id: int, new_tier: TierConvertFromNumber, expiry_ts: int | None):
+    """expiry_ts: subscription end in epoch seconds (UTC), or None for no expiry."""
     db = await get_db()
-    await execute_write(db, UPDATE_TIER, (user_id, new_tier, expiry_date))
+    await execute_write(db, UPDATE_TIER, (user_id, new_tier, expiry_ts))
+    TIER_CACHE.set(user_id, int(new_tier))
 
 
-async def get_all_personal() -> list[tuple[int, int, str]]:
-    """
-    Returns [(user_id, interval_minutes, first_fire_iso)] for *all* rows.
-    """
-    db = await get_db()
-    async with db.execute(
-        "SELECT user_id, interval_minutes, first_fire_time FROM personal_subscribers"
-    ) as cur:
-        return await cur.fetchall()
+async def get_all_personal() -> list[PersonalPlan]:
+    async with read_db() as db, db.execute(SELECT_PERSONAL) as cur:
+        return [PersonalPlan(*row) for row in await cur.fetchall()]
+
+
+async def load_personal_plan_index() -> None:
+    """Build the in-memory personal plan fire schedule from personal_subscribers (once, at startup)."""
+    PLAN_INDEX.clear()
+    now_min = epoch_minute(CLOCK.now())
+    for plan in await get_all_personal():
+        PLAN_INDEX.add(plan.id, plan.user_id, plan.interval, plan.first_fire_min, now_min)
+    logging.info("Loaded %s personal plans into the fire schedule.", len(PLAN_INDEX))
 
 
 REMOVE_PERSONAL_SUB = """DELETE FROM personal_subscribers WHERE id = ?"""
@@ -281,6 +307,18 @@ REMOVE_PERSONAL_SUB = """DELETE FROM personal_subscribers WHERE id = ?"""
 async def delete_personal_plan(plan_id: int):
     db = await get_db()
     await execute_write(db, REMOVE_PERSONAL_SUB, (plan_id,))
+    PLAN_INDEX.remove(plan_id)
+
+
+async def delete_personal_plans(plan_ids: list[int]) -> None:
+    """Remove many plans with one statement per chunk (one transaction with group commit)."""
+    db = await get_db()
+    await asyncio.gather(*(
+        execute_write(db, f"DELETE FROM personal_subscribers WHERE id IN ({','.join('?' * len(chunk))})", tuple(chunk))
+        for chunk in _chunks(plan_ids)
+    ))
+    for plan_id in plan_ids:
+        PLAN_INDEX.remove(plan_id)
 
 
 SET_USER_TZ = """
@@ -297,6 +335,7 @@ ON CONFLICT(user_id) DO UPDATE SET
 async def set_user_timezone(user_id: int, timezone: str | None, offset_minutes: int, method: str):
     db = await get_db()
     await execute_write(db, SET_USER_TZ, (user_id, timezone, offset_minutes, method))
+    TIMEZONE_CACHE.set(user_id, {"timezone": timezone, "offset_minutes": offset_minutes, "method": method})
 
 
 GET_USER_TZ = """
@@ -305,13 +344,69 @@ SELECT timezone, offset_minutes, tz_method FROM user_time_settings WHERE user_id
 
 
 async def get_user_timezone(user_id: int) -> dict | None:
-    db = await get_db()
+    cached = TIMEZONE_CACHE.get(user_id)
+    if cached is not MISSING:
+        return dict(cached)
+
+    token = TIMEZONE_CACHE.token()
     tz_data = {"timezone": None, "offset_minutes": 0, "method": None}
-    async with db.execute(GET_USER_TZ, (user_id,)) as cursor:
+    async with read_db() as db, db.execute(GET_USER_TZ, (user_id,)) as cursor:
         row = await cursor.fetchone()
         if row:
             tz_data["timezone"], tz_data["offset_minutes"], tz_data["method"] = (row[0], row[1], row[2])
-        return tz_data
+    TIMEZONE_CACHE.fill(user_id, tz_data, token)
+    return dict(tz_data)
+
+
+@dataclass(frozen=True, slots=True)
+class UserPrefs:
+    currencies: tuple[str, ...] | None  # None → all currencies
+    tz_data: dict  # same shape as get_user_timezone()
+
+
+DEFAULT_USER_PREFS = UserPrefs(currencies=None, tz_data={"timezone": None, "offset_minutes": 0, "method": None})
+
+
+def _chunks(ids: list[int], size: int = BULK_CHUNK_SIZE) -> Iterable[list[int]]:
+    for i in range(0, len(ids), size):
+        yield ids[i: i + size]
+
+
+async def load_user_preferences(user_ids: Iterable[int]) -> dict[int, UserPrefs]:
+    """
+    Bulk variant of load_user_currencies + get_user_timezone for broadcasts.
+    Uses chunked IN (...) queries instead of two point queries per user.
+    Users without any stored settings are omitted – use DEFAULT_USER_PREFS for them.
+    """
+    ids = list(user_ids)
+    currencies: dict[int, tuple[str, ...]] = {}
+    tz_settings: dict[int, dict] = {}
+    shared_tz: dict[tuple, dict] = {}  # identical settings share one dict
+
+    for chunk in _chunks(ids):
+        marks = ",".join("?" * len(chunk))
+        async with read_db() as db:  # one pooled reader per chunk, so interactive reads interleave
+            async with db.execute(
+                f"SELECT user_id, currencies FROM currency_preferences WHERE user_id IN ({marks})", chunk
+            ) as cursor:
+                for user_id, currency_str in await cursor.fetchall():
+                    if currency_str:
+                        currencies[user_id] = tuple(currency_str.split(","))
+            async with db.execute(
+                "SELECT user_id, timezone, offset_minutes, tz_method FROM user_time_settings "
+                f"WHERE user_id IN ({marks})",
+                chunk,
+            ) as cursor:
+                for user_id, *row in await cursor.fetchall():
+                    key = tuple(row)
+                    if key not in shared_tz:
+                        shared_tz[key] = {"timezone": row[0], "offset_minutes": row[1], "method": row[2]}
+                    tz_settings[user_id] = shared_tz[key]
+
+    return {
+        user_id: UserPrefs(currencies.get(user_id), tz_settings.get(user_id, DEFAULT_USER_PREFS.tz_data))
+        for user_id in currencies.keys() | tz_settings.keys()
+    }
 
 
 RECORD_PAYMENT = """
@@ -348,9 +443,7 @@ GET_EXPIRED = "SELECT message_id, chat_id FROM invoices WHERE created_at < ?"
 
 
 async def get_expired_invoice_messages(cutoff: int) -> list[tuple[int, int]]:
-    db = await get_db()
-
-    async with db.execute(GET_EXPIRED, (cutoff,)) as cursor:
+    async with read_db() as db, db.execute(GET_EXPIRED, (cutoff,)) as cursor:
         return await cursor.fetchall()
 
 
@@ -362,18 +455,202 @@ async def remove_invoice_from_db(message_id: int):
     await execute_write(db, DELETE_INVOICE, (message_id,))
 
 
+async def remove_invoices_from_db(message_ids: list[int]) -> None:
+    db = await get_db()
+    await asyncio.gather(*(
+        execute_write(db, f"DELETE FROM invoices WHERE message_id IN ({','.join('?' * len(chunk))})", tuple(chunk))
+        for chunk in _chunks(message_ids)
+    ))
+
+
+class ExpiredSubscription(NamedTuple):
+    user_id: int
+    subscription_end: int  # epoch seconds (UTC)
+    tier: int
+
+
 GET_EXPIRED_SUBS = """
 SELECT user_id, subscription_end, tier
 FROM   user_subscriptions
-WHERE  subscription_end IS NOT NULL AND  subscription_end < CURRENT_TIMESTAMP
+WHERE  subscription_end < ?
 """
 
 
-async def get_expired_subscriptions() -> list[tuple[int, str, int]]:
+async def get_expired_subscriptions(now_ts: int | None = None) -> list[ExpiredSubscription]:
+    now_ts = int(CLOCK.time()) if now_ts is None else now_ts
+    async with read_db() as db, db.execute(GET_EXPIRED_SUBS, (now_ts,)) as cursor:
+        return [ExpiredSubscription(*row) for row in await cursor.fetchall()]
+
+
+async def downgrade_user(user_id: int, expiry_ts: int | None = None) -> None:
+    await update_user_tier(user_id, TierConvertFromNumber.FREE, expiry_ts)
+
+
+ADD_PRICE_ALERT = """
+INSERT INTO price_alerts (user_id, currency, threshold)
+VALUES (?, ?, ?)
+"""
+
+
+async def add_price_alert(user_id: int, currency: str, threshold: float) -> None:
     db = await get_db()
-    async with db.execute(GET_EXPIRED_SUBS) as cursor:
+    alert_id = await execute_write(db, ADD_PRICE_ALERT, (user_id, currency.lower(), threshold))
+    ALERT_INDEX.add(PriceAlert(alert_id, user_id, currency.lower(), threshold))
+
+
+async def get_price_alerts(user_id: int) -> list[tuple[int, str, float]]:
+    """Returns [(alert_id, currency, threshold)] for the given user, oldest first."""
+    async with read_db() as db, db.execute(
+        "SELECT id, currency, threshold FROM price_alerts WHERE user_id = ? ORDER BY id", (user_id,)
+    ) as cursor:
         return await cursor.fetchall()
 
 
-async def downgrade_user(user_id: int, expiry_date: str | None = None) -> None:
-    await update_user_tier(user_id, TierConvertFromNumber.FREE, expiry_date)
+async def count_price_alerts(user_id: int) -> int:
+    async with read_db() as db, db.execute(
+        "SELECT COUNT(*) FROM price_alerts WHERE user_id = ?", (user_id,)
+    ) as cur:
+        row = await cur.fetchone()
+        return row[0] if row else 0
+
+
+REMOVE_PRICE_ALERT = "DELETE FROM price_alerts WHERE id = ? AND user_id = ?"
+
+
+async def delete_price_alert(alert_id: int, user_id: int) -> None:
+    db = await get_db()
+    await execute_write(db, REMOVE_PRICE_ALERT, (alert_id, user_id))
+    alert = ALERT_INDEX.get(alert_id)
+    if alert is not None and alert.user_id == user_id:  # someone else's id deletes nothing, so keeps its alert
+        ALERT_INDEX.remove(alert_id)
+
+
+async def delete_price_alerts(alert_ids: list[int]) -> list[int]:
+    """
+    Remove many alerts (e.g. all alerts fired by one tick) with one statement per chunk, one chunk
+    after the other. Stops at the first failing chunk and returns the ids whose rows are still
+    there (empty when everything was deleted), so callers know exactly which alerts survived.
+    """
+    db = await get_db()
+    done = 0
+    for chunk in _chunks(alert_ids):
+        try:
+            await execute_write(db, f"DELETE FROM price_alerts WHERE id IN ({','.join('?' * len(chunk))})",
+                                tuple(chunk))
+        except Exception as e:
+            logging.error("Failed to delete %s price alerts: %s", len(alert_ids) - done, e)
+            return alert_ids[done:]
+        for alert_id in chunk:
+            ALERT_INDEX.remove(alert_id)
+        done += len(chunk)
+    return []
+
+
+async def load_price_alert_index() -> None:
+    """Build the in-memory alert index from price_alerts (once, at startup)."""
+    ALERT_INDEX.clear()
+    async with read_db() as db, db.execute("SELECT id, user_id, currency, threshold FROM price_alerts") as cursor:
+        for row in await cursor.fetchall():
+            ALERT_INDEX.add(PriceAlert(*row))
+    logging.info("Loaded %s price alerts into the alert index.", len(ALERT_INDEX))
+
+
+OUTBOX_PENDING, OUTBOX_DELIVERED, OUTBOX_FAILED, OUTBOX_EXPIRED = range(4)
+
+
+class OutboxRow(NamedTuple):
+    id: int
+    user_id: int
+    fire_min: int  # schedule minute (epoch minutes, UTC)
+    attempts: int
+
+
+async def enqueue_notifications(due: Iterable[tuple[int, int]]) -> None:
+    """
+    Write (user_id, fire_min) notifications as pending outbox rows, one multi-row INSERT per chunk.
+    A (user, minute) pair that is already queued is ignored, so replaying a tick is harmless.
+    """
+    db = await get_db()
+    now_ts = int(CLOCK.time())
+    rows = [(user_id, fire_min, now_ts) for user_id, fire_min in due]
+    await asyncio.gather(*(
+        execute_write(
+            db,
+            "INSERT OR IGNORE INTO notification_outbox (user_id, fire_min, next_attempt_at) VALUES "
+            + ",".join(["(?, ?, ?)"] * len(chunk)),
+            tuple(value for row in chunk for value in row),
+        )
+        for chunk in _chunks(rows)
+    ))
+
+
+CLAIM_DUE_NOTIFICATIONS = """
+UPDATE notification_outbox SET next_attempt_at = ?
+WHERE id IN (
+    SELECT id FROM notification_outbox
+    WHERE status = 0 AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?
+)
+RETURNING id, user_id, fire_min, attempts
+"""
+
+
+async def claim_due_notifications(now_ts: int, limit: int, lease_until: int) -> list[OutboxRow]:
+    """
+    Atomically take up to `limit` due pending rows: one UPDATE ... RETURNING moves their next
+    attempt to `lease_until`, so no other drainer sees them meanwhile. The claimer settles them
+    with finish_notifications / retry_notifications; rows a crashed drainer never settled simply
+    become due again when the lease runs out.
+    """
+    db = await get_db()
+    rows = await execute_write(db, CLAIM_DUE_NOTIFICATIONS, (lease_until, now_ts, limit), fetch=True)
+    return [OutboxRow(*row) for row in rows]
+
+
+async def finish_notifications(ids: list[int], status: int, error: str | None = None) -> None:
+    """Mark rows delivered / failed / expired (one statement per chunk)."""
+    db = await get_db()
+    await asyncio.gather(*(
+        execute_write(
+            db,
+            "UPDATE notification_outbox SET status = ?, attempts = attempts + 1, last_error = ? "
+            f"WHERE id IN ({','.join('?' * len(chunk))})",
+            (status, error, *chunk),
+        )
+        for chunk in _chunks(ids)
+    ))
+
+
+async def retry_notifications(ids: list[int], next_attempt_at: int, error: str) -> None:
+    db = await get_db()
+    await asyncio.gather(*(
+        execute_write(
+            db,
+            "UPDATE notification_outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+            f"WHERE id IN ({','.join('?' * len(chunk))})",
+            (next_attempt_at, error, *chunk),
+        )
+        for chunk in _chunks(ids)
+    ))
+
+
+async def prune_notifications(before_min: int) -> None:
+    """Drop finished rows scheduled before before_min."""
+    db = await get_db()
+    await execute_write(db, "DELETE FROM notification_outbox WHERE status != 0 AND fire_min < ?", (before_min,))
+
+
+async def get_scheduler_state(key: str) -> int | None:
+    async with read_db() as db, db.execute("SELECT value FROM scheduler_state WHERE key = ?", (key,)) as cursor:
+        row = await cursor.fetchone()
+        return row[0] if row else None
+
+
+SET_SCHEDULER_STATE = """
+INSERT INTO scheduler_state (key, value) VALUES (?, ?)
+ON CONFLICT(key) DO UPDATE SET value = excluded.value
+"""
+
+
+async def set_scheduler_state(key: str, value: int) -> None:
+    db = await get_db()
+    await execute_write(db, SET_SCHEDULER_STATE, (key, value))
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass
+
+import aiosqlite
+
+
+@dataclass(frozen=True, slots=True)
+class Migration:
+    version: int
+    name: str
+    statements: tuple[str, ...]
+
+
+# Ordered and append-only: never edit a released migration, add a new one instead.
+# Statements are idempotent (IF NOT EXISTS), so version 1 also adopts databases created before migrations existed.
+MIGRATIONS = (
+    Migration(1, "baseline schema", (
+        """
+        CREATE TABLE IF NOT EXISTS currency_preferences (
+            user_id INTEGER PRIMARY KEY,
+            currencies TEXT  -- Stored as comma-separated values
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS base_subscribers (
+            user_id INTEGER,
+            interval_minutes INTEGER,
+            PRIMARY KEY(user_id, interval_minutes)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS personal_subscribers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            interval_minutes INTEGER NOT NULL,
+            first_fire_time TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_time_settings (
+            user_id INTEGER PRIMARY KEY,
+            timezone TEXT NULL,
+            offset_minutes INTEGER NOT NULL DEFAULT 0,
+            tz_method TEXT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_subscriptions (
+            user_id INTEGER PRIMARY KEY,
+            tier INTEGER DEFAULT 0,
+            subscription_end DATETIME,        -- if using expiring subscriptions
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            operation_type TEXT NOT NULL,
+            tier INTEGER NOT NULL,
+            currency TEXT NOT NULL,
+            amount INTEGER NOT NULL,  -- in cents/kopecks
+            provider TEXT NOT NULL,
+            telegram_payment_charge_id TEXT UNIQUE NOT NULL,
+            provider_payment_charge_id TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS invoices (
+            message_id INTEGER PRIMARY KEY,
+            chat_id INTEGER NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS price_alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            currency TEXT NOT NULL,   -- lower-case, as in price data
+            threshold REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    )),
+    Migration(2, "indexes for hot-path filters", (
+        "CREATE INDEX IF NOT EXISTS idx_personal_subscribers_user ON personal_subscribers (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_base_subscribers_interval ON base_subscribers (interval_minutes)",
+        "CREATE INDEX IF NOT EXISTS idx_invoices_created_at ON invoices (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_user_subscriptions_end ON user_subscriptions (subscription_end)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_user ON payments (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_price_alerts_user ON price_alerts (user_id)",
+    )),
+    # ISO text → integer epochs, so the scheduler and the expiry sweep never parse dates.
+    # SQLite can't change a column type in place: rebuild, copy, swap, re-index.
+    Migration(3, "integer epoch timestamps", (
+        """
+        CREATE TABLE personal_subscribers_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            interval_minutes INTEGER NOT NULL,
+            first_fire_min INTEGER NOT NULL,  -- minutes since the Unix epoch (UTC)
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        INSERT INTO personal_subscribers_new (id, user_id, interval_minutes, first_fire_min, created_at)
+        SELECT id, user_id, interval_minutes, CAST(strftime('%s', first_fire_time) AS INTEGER) / 60, created_at
+        FROM personal_subscribers
+        """,
+        "DROP TABLE personal_subscribers",
+        "ALTER TABLE personal_subscribers_new RENAME TO personal_subscribers",
+        "CREATE INDEX idx_personal_subscribers_user ON personal_subscribers (user_id, created_at)",
+        """
+        CREATE TABLE user_subscriptions_new (
+            user_id INTEGER PRIMARY KEY,
+            tier INTEGER DEFAULT 0,
+            subscription_end INTEGER,  -- epoch seconds (UTC), if using expiring subscriptions
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        INSERT INTO user_subscriptions_new (user_id, tier, subscription_end, updated_at)
+        SELECT user_id, tier, CAST(strftime('%s', subscription_end) AS INTEGER), updated_at
+        FROM user_subscriptions
+        """,
+        "DROP TABLE user_subscriptions",
+        "ALTER TABLE user_subscriptions_new RENAME TO user_subscriptions",
+        "CREATE INDEX idx_user_subscriptions_end ON user_subscriptions (subscription_end)",
+    )),
+    Migration(4, "notification outbox", (
+        """
+        CREATE TABLE IF NOT EXISTS notification_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            fire_min INTEGER NOT NULL,         -- schedule minute (epoch minutes, UTC)
+            status INTEGER NOT NULL DEFAULT 0, -- 0 pending, 1 delivered, 2 failed, 3 expired
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at INTEGER NOT NULL,  -- epoch seconds
+            last_error TEXT NULL,
+            UNIQUE (user_id, fire_min)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_outbox_pending ON notification_outbox (next_attempt_at) WHERE status = 0",
+        "CREATE INDEX IF NOT EXISTS idx_outbox_fire_min ON notification_outbox (fire_min)",
+        """
+        CREATE TABLE IF NOT EXISTS scheduler_state (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+        """,
+    )),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+async def get_schema_version(db: aiosqlite.Connection) -> int:
+    async with db.execute("PRAGMA user_version") as cursor:
+        row = await cursor.fetchone()
+        return row[0]
+
+
+async def apply_migrations(db: aiosqlite.Connection) -> int:
+    """
+    Bring the schema up to SCHEMA_VERSION. Each migration runs in its own transaction together
+    with its `PRAGMA user_version` bump, so a crash never leaves a half-applied version behind.
+    Returns the number of migrations applied.
+    """
+    current = await get_schema_version(db)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema v{current} is newer than this code (v{SCHEMA_VERSION})")
+
+    pending = [m for m in MIGRATIONS if m.version > current]
+    for migration in pending:
+        await db.execute("BEGIN")
+        try:
+            for statement in migration.statements:
+                await db.execute(statement)
+            await db.execute(f"PRAGMA user_version = {migration.version}")
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logging.error("❌ Migration %s (%s) failed", migration.version, migration.name)
+            raise
+        logging.info("Applied DB migration %s: %s", migration.version, migration.name)
+    return len(pending)
+
+
+# Filters on the request / scheduler hot path; each must be answered through an index.
+HOT_QUERIES = {
+    "get_personal_plans": (
+        "SELECT id, user_id, interval_minutes, first_fire_min FROM personal_subscribers "
+        "WHERE user_id = ? ORDER BY created_at",
+        (0,),
+    ),
+    "count_personal_plans": ("SELECT COUNT(*) FROM personal_subscribers WHERE user_id = ?", (0,)),
+    "get_base_subscribers": ("SELECT user_id FROM base_subscribers WHERE interval_minutes = ?", (0,)),
+    "get_user_base_subscriptions": ("SELECT interval_minutes FROM base_subscribers WHERE user_id = ?", (0,)),
+    "get_expired_invoice_messages": ("SELECT message_id, chat_id FROM invoices WHERE created_at < ?", (0,)),
+    "get_expired_subscriptions": (
+        "SELECT user_id, subscription_end, tier FROM user_subscriptions WHERE subscription_end < ?",
+        (0,),
+    ),
+    "payments_by_user": ("SELECT id FROM payments WHERE user_id = ?", (0,)),
+    "get_price_alerts": ("SELECT id, currency, threshold FROM price_alerts WHERE user_id = ? ORDER BY id", (0,)),
+    "claim_due_notifications": (
+        "SELECT id FROM notification_outbox WHERE status = 0 AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+        (0, 1),
+    ),
+}
+
+
+async def check_query_plans(db: aiosqlite.Connection) -> dict[str, list[str]]:
+    """
+    Run EXPLAIN QUERY PLAN for every HOT_QUERIES entry.
+    Returns {name: plan details} for queries that still do a full table scan (empty = all indexed).
+    """
+    full_scans = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        async with db.execute(f"EXPLAIN QUERY PLAN {sql}", params) as cursor:
+            details = [row[3] for row in await cursor.fetchall()]
+        if any(d.startswith("SCAN") and "USING" not in d for d in details):
+            full_scans[name] = details
+    return full_scans
+
+
+async def _main(path: str) -> int:
+    db = await aiosqlite.connect(path)
+    try:
+        applied = await apply_migrations(db)
+        print(f"Schema v{await get_schema_version(db)} ({applied} migration(s) applied)")
+        full_scans = await check_query_plans(db)
+        for name in HOT_QUERIES:
+            print(f"{'❌ SCAN ' if name in full_scans else '✅ index'}  {name}  {full_scans.get(name, '')}")
+        return 1 if full_scans else 0
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    # python -m db.migrations [path]  – migrate a database file and verify the hot-query plans
+    from db.db import DB_NAME
+
+    sys.exit(asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else DB_NAME)))
@@ -0,0 +1,75 @@
+import heapq
+from datetime import datetime, timezone
+
+
+def epoch_minute(dt: datetime) -> int:
+    """Minutes since the Unix epoch for an aware datetime."""
+    return int(dt.timestamp()) // 60
+
+
+def from_epoch_minute(minute: int) -> datetime:
+    """Naive UTC datetime for an epoch minute (the form util.convert_utc_to_local expects)."""
+    return datetime.fromtimestamp(minute * 60, timezone.utc).replace(tzinfo=None)
+
+
+class PersonalPlanIndex:
+    """
+    In-memory fire schedule for personal plans.
+
+    A min-heap keyed by the next fire minute (epoch minutes, UTC), so a tick only
+    touches the plans that are actually due instead of re-checking every row.
+    Deleted plans are dropped lazily when their heap entry comes up.
+    """
+
+    def __init__(self):
+        self._plans: dict[int, tuple[int, int, int]] = {}  # plan_id -> (user_id, interval, first_min)
+        self._heap: list[tuple[int, int]] = []  # (next_fire_min, plan_id)
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def clear(self) -> None:
+        self._plans.clear()
+        self._heap.clear()
+
+    def add(self, plan_id: int, user_id: int, interval: int, first_min: int, now_min: int) -> None:
+        self._plans[plan_id] = (user_id, interval, first_min)
+        heapq.heappush(self._heap, (self._next_fire(first_min, interval, now_min), plan_id))
+
+    def remove(self, plan_id: int) -> None:
+        self._plans.pop(plan_id, None)
+
+    def pop_due(self, now_min: int) -> set[int]:
+        """
+        Return user_ids whose plans fire at now_min and reschedule those plans.
+        Entries left behind by a missed tick are moved forward without firing.
+        """
+        due = set()
+        heap = self._heap
+        while heap and heap[0][0] <= now_min:
+            fire_min, plan_id = heapq.heappop(heap)
+            plan = self._plans.get(plan_id)
+            if plan is None:
+                continue  # deleted since it was scheduled
+            user_id, interval, first_min = plan
+            if fire_min == now_min:
+                due.add(user_id)
+                next_fire = now_min + interval
+            else:
+                next_fire = self._next_fire(first_min, interval, now_min)
+                if next_fire == now_min:
+                    due.add(user_id)
+                    next_fire += interval
+            heapq.heappush(heap, (next_fire, plan_id))
+        return due
+
+    @staticmethod
+    def _next_fire(first_min: int, interval: int, now_min: int) -> int:
+        """First fire minute that is >= now_min."""
+        if now_min <= first_min:
+            return first_min
+        elapsed = now_min - first_min
+        return first_min + -(-elapsed // interval) * interval
+
+
+PLAN_INDEX = PersonalPlanIndex()
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+
+import aiosqlite
+
+from clock import CLOCK
+from config import PRICE_RETENTION
+from db.db import DB_PATH
+from metrics import PRICE_TICK_GAPS
+
+PRICE_DB_NAME = str(Path(DB_PATH.parent, "btc_price_history.db"))
+
+# Bucket widths in seconds, finest first. 60 s rows are the raw per-minute ticks.
+RESOLUTIONS = (60, 300, 3600, 86400)
+
+_PRICE_DB: aiosqlite.Connection | None = None
+_PRICE_LOCK = asyncio.Lock()
+_PENDING_TICKS: list[tuple[str, int, float]] = []  # (currency, ts, price) waiting for the next flush
+_LAST_TICK_MIN: int | None = None  # newest minute written by flush_ticks, for gap detection
+
+
+async def get_price_db() -> aiosqlite.Connection:
+    """Separate SQLite file, so history writes never queue behind user-facing writes."""
+    global _PRICE_DB
+    async with _PRICE_LOCK:
+        if _PRICE_DB is None:
+            _PRICE_DB = await aiosqlite.connect(PRICE_DB_NAME)
+            await _PRICE_DB.execute("PRAGMA journal_mode=WAL;")
+            await _PRICE_DB.execute("PRAGMA synchronous=NORMAL;")  # history can afford to lose the last batch
+        return _PRICE_DB
+
+
+async def close_price_db() -> None:
+    global _PRICE_DB
+    if _PRICE_DB is not None:
+        await _PRICE_DB.close()
+        _PRICE_DB = None
+
+
+async def init_price_db():
+    db = await get_price_db()
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS price_ohlc (
+            resolution INTEGER NOT NULL,  -- bucket width in seconds
+            currency TEXT NOT NULL,
+            bucket INTEGER NOT NULL,      -- bucket start, epoch seconds
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            PRIMARY KEY (resolution, currency, bucket)
+        ) WITHOUT ROWID
+    """
+    )
+    await db.commit()
+
+
+def record_tick(ts: float, prices: dict[str, float]) -> None:
+    """Buffer a fetched quote; written to disk by the next flush_ticks()."""
+    for currency, price in prices.items():
+        _PENDING_TICKS.append((currency, int(ts), float(price)))
+
+
+UPSERT_TICK = """
+INSERT INTO price_ohlc (resolution, currency, bucket, open, high, low, close)
+VALUES (60, ?1, ?2 - ?2 % 60, ?3, ?3, ?3, ?3)
+ON CONFLICT(resolution, currency, bucket) DO UPDATE SET
+    high  = max(high, excluded.high),
+    low   = min(low, excluded.low),
+    close = excluded.close
+"""
+
+
+async def flush_ticks() -> int:
+    """Write all buffered ticks in one transaction. Returns the number of ticks written."""
+    if not _PENDING_TICKS:
+        return 0
+    batch = _PENDING_TICKS.copy()
+    _PENDING_TICKS.clear()
+    try:
+        db = await get_price_db()
+        await db.executemany(UPSERT_TICK, batch)
+        await db.commit()
+    except Exception:
+        _PENDING_TICKS[:0] = batch  # keep them for the next attempt
+        raise
+    missed = _count_missed_minutes(batch)
+    if missed:
+        PRICE_TICK_GAPS.inc(missed)
+        logging.warning("📉 Price history has %s minutes without a tick (up to %s)", missed,
+                        time.strftime("%H:%M UTC", time.gmtime(_LAST_TICK_MIN * 60)))
+    return len(batch)
+
+
+def _count_missed_minutes(batch: list[tuple[str, int, float]]) -> int:
+    """Minutes between the flushed ticks (and the previous flush) that have no tick at all."""
+    global _LAST_TICK_MIN
+    missed = 0
+    for minute in sorted({ts // 60 for _, ts, _ in batch}):
+        if _LAST_TICK_MIN is not None:
+            if minute <= _LAST_TICK_MIN:
+                continue
+            missed += minute - _LAST_TICK_MIN - 1
+        _LAST_TICK_MIN = minute
+    return missed
+
+
+UPSERT_BUCKET = """
+INSERT OR REPLACE INTO price_ohlc (resolution, currency, bucket, open, high, low, close)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+async def compact(now: float | None = None) -> None:
+    """
+    Roll each resolution up into the next coarser one (1 min → 5 min → 1 h → 1 day) and
+    drop rows older than their PRICE_RETENTION. The newest coarse bucket is recomputed on
+    every run, so partially filled buckets converge as more ticks arrive.
+    """
+    now = CLOCK.time() if now is None else now
+    db = await get_price_db()
+    for fine, coarse in zip(RESOLUTIONS, RESOLUTIONS[1:]):
+        async with db.execute("SELECT MAX(bucket) FROM price_ohlc WHERE resolution = ?", (coarse,)) as cursor:
+            row = await cursor.fetchone()
+        since = row[0] if row and row[0] is not None else 0
+        async with db.execute(
+            "SELECT currency, bucket, open, high, low, close FROM price_ohlc "
+            "WHERE resolution = ? AND bucket >= ? ORDER BY currency, bucket",
+            (fine, since),
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+        buckets: dict[tuple[str, int], list[float]] = {}
+        for currency, bucket, open_, high, low, close in rows:
+            key = (currency, bucket - bucket % coarse)
+            agg = buckets.get(key)
+            if agg is None:
+                buckets[key] = [open_, high, low, close]
+            else:
+                agg[1], agg[2], agg[3] = max(agg[1], high), min(agg[2], low), close
+        await db.executemany(
+            UPSERT_BUCKET, [(coarse, currency, bucket, *ohlc) for (currency, bucket), ohlc in buckets.items()]
+        )
+
+    for resolution in RESOLUTIONS:
+        retention = PRICE_RETENTION.get(resolution)
+        if retention is not None:
+            await db.execute(
+                "DELETE FROM price_ohlc WHERE resolution = ? AND bucket < ?", (resolution, int(now - retention))
+            )
+    await db.commit()
+
+
+def pick_resolution(start: float, end: float, max_points: int, now: float) -> int:
+    """Finest resolution that still covers start and returns at most max_points rows."""
+    for resolution in RESOLUTIONS:
+        retention = PRICE_RETENTION.get(resolution)
+        covers = retention is None or start >= now - retention
+        if covers and (end - start) / resolution <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+async def get_price_range(currency: str, start: float, end: float,
+                          max_points: int = 500) -> tuple[int, list[tuple[int, float, float, float, float]]]:
+    """
+    OHLC rows [(bucket, open, high, low, close)] for a chart or statistic, read from the
+    coarsest resolution that is good enough. Returns (resolution, rows).
+    """
+    resolution = pick_resolution(start, end, max_points, CLOCK.time())
+    db = await get_price_db()
+    async with db.execute(
+        "SELECT bucket, open, high, low, close FROM price_ohlc "
+        "WHERE resolution = ? AND currency = ? AND bucket >= ? AND bucket <= ? ORDER BY bucket",
+        (resolution, currency.lower(), int(start) - int(start) % resolution, int(end)),
+    ) as cursor:
+        return resolution, await cursor.fetchall()
+
+
+async def load_recent_ticks(since: float) -> list[tuple[float, str, float]]:
+    """Raw per-minute closes since `since` as (ts, currency, price), oldest first – for warm starts."""
+    db = await get_price_db()
+    async with db.execute(
+        "SELECT bucket, currency, close FROM price_ohlc WHERE resolution = 60 AND bucket >= ? ORDER BY bucket",
+        (int(since),),
+    ) as cursor:
+        return await cursor.fetchall()
+
+
+async def shutdown_price_store() -> None:
+    try:
+        await flush_ticks()
+    except Exception as e:
+        logging.error("Failed to flush price ticks on shutdown: %s", e)
+    await close_price_db()
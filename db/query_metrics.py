@@ -0,0 +1,64 @@
+import re
+import time
+from functools import lru_cache
+
+import aiosqlite
+
+from handler_timing import account
+from metrics import DB_QUERY_SECONDS
+
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def query_label(sql: str) -> str:
+    """Low-cardinality metric label for a statement: verb plus first table, e.g. "select personal_subscribers"."""
+    words = sql.split(None, 1)
+    verb = words[0].lower() if words else "?"
+    table = _TABLE.search(sql)
+    return f"{verb} {table.group(1)}" if table else verb
+
+
+class _TimedQuery:
+    """Wraps aiosqlite's execute() result; in `async with` form the timing includes fetching the rows."""
+
+    __slots__ = ("_result", "_label", "_started", "_cursor")
+
+    def __init__(self, result, sql: str):
+        self._result = result
+        self._label = query_label(sql)
+        self._started = time.perf_counter()
+        self._cursor = None
+
+    def __await__(self):
+        cursor = yield from self._result.__await__()
+        self._observe()
+        return cursor
+
+    async def __aenter__(self) -> aiosqlite.Cursor:
+        self._cursor = await self._result
+        return self._cursor
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._cursor.close()
+        self._observe()
+
+    def _observe(self) -> None:
+        elapsed = time.perf_counter() - self._started
+        DB_QUERY_SECONDS.labels(self._label).observe(elapsed)
+        account("db", elapsed, self._label)
+
+
+class TimedConnection:
+    """Read connection handed out by ReadPool: execute() is timed per query label, the rest is delegated."""
+
+    __slots__ = ("_db",)
+
+    def __init__(self, db: aiosqlite.Connection):
+        self._db = db
+
+    def execute(self, sql: str, parameters=None) -> _TimedQuery:
+        return _TimedQuery(self._db.execute(sql, parameters), sql)
+
+    def __getattr__(self, name: str):
+        return getattr(self._db, name)
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+import aiosqlite
+
+from db.query_metrics import TimedConnection
+
+
+class ReadPool:
+    """
+    Small pool of read-only connections to a WAL database. Each aiosqlite connection owns
+    one thread, so pooled readers run side by side instead of queueing behind the writer
+    connection (and behind each other). Connections are opened lazily, up to `size`.
+    """
+
+    def __init__(self, database: Callable[[], str], size: int, pragmas: dict[str, object]):
+        self._database = database  # callable, so a changed DB_NAME is picked up
+        self.size = size
+        self.pragmas = pragmas
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._opened = 0
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[TimedConnection]:
+        db = await self._acquire()
+        try:
+            yield TimedConnection(db)
+        finally:
+            self._idle.put_nowait(db)
+
+    async def close(self) -> None:
+        """Close idle connections; call once nothing reads any more (shutdown)."""
+        while not self._idle.empty():
+            await self._idle.get_nowait().close()
+            self._opened -= 1
+
+    async def _acquire(self) -> aiosqlite.Connection:
+        if self._idle.empty() and self._opened < self.size:
+            self._opened += 1
+            try:
+                return await self._open()
+            except Exception:
+                self._opened -= 1
+                raise
+        return await self._idle.get()
+
+    async def _open(self) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self._database())
+        for name, value in self.pragmas.items():
+            await db.execute(f"PRAGMA {name}={value};")
+        logging.debug("Opened read connection %s/%s", self._opened, self.size)
+        return db
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import aiosqlite
+
+from db.query_metrics import query_label
+from metrics import DB_COMMIT_SECONDS, DB_QUERY_SECONDS
+
+
+@dataclass(slots=True)
+class PendingWrite:
+    sql: str
+    params: tuple
+    fetch: bool = False  # resolve with the statement's rows (e.g. UPDATE ... RETURNING) instead of lastrowid
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class GroupCommitWriter:
+    """
+    Group commit for the shared connection: writes are queued and applied in one transaction
+    per `window` seconds or per `max_batch` statements, whichever comes first – one fsync per
+    batch instead of one per statement.
+
+    Each statement runs inside its own SAVEPOINT, so a failing statement (e.g. a UNIQUE
+    violation) only fails its own caller. Every caller's future resolves after COMMIT, so
+    awaiting a write still means "it is on disk".
+    """
+
+    def __init__(self, connect: Callable[[], Awaitable[aiosqlite.Connection]], window: float, max_batch: int,
+                 max_retries: int, retry_delay: float):
+        self._connect = connect
+        self.window = window
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._queue: asyncio.Queue[PendingWrite] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self.batches = 0
+        self.statements = 0
+
+    async def execute(self, sql: str, params: tuple, fetch: bool = False) -> int | list | None:
+        """
+        Queue one statement; returns its lastrowid (or with `fetch`, its rows) once the batch it
+        landed in is committed.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="db-group-commit")
+        write = PendingWrite(sql, params, fetch)
+        self._queue.put_nowait(write)
+        return await write.future
+
+    async def flush(self) -> None:
+        """Wait until everything queued so far is committed."""
+        if self._task is not None and not self._task.done():
+            await self._queue.join()
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._commit_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _commit_batch(self, batch: list[PendingWrite]) -> None:
+        for attempt in range(self.max_retries):
+            try:
+                results = await self._apply(batch)
+                break
+            except aiosqlite.OperationalError as e:
+                if "database is locked" in str(e).lower() and attempt + 1 < self.max_retries:
+                    logging.warning("Retrying DB write batch of %s after lock", len(batch))
+                    await asyncio.sleep(self.retry_delay)
+                    continue
+                logging.error("DB write batch of %s failed: %s", len(batch), e)
+                results = [e] * len(batch)
+                break
+            except Exception as e:
+                logging.error("DB write batch of %s failed: %s", len(batch), e)
+                results = [e] * len(batch)
+                break
+
+        self.batches += 1
+        self.statements += len(batch)
+        for write, result in zip(batch, results):
+            if write.future.done():  # caller was cancelled
+                continue
+            if isinstance(result, BaseException):
+                write.future.set_exception(result)
+            else:
+                write.future.set_result(result)
+
+    async def _apply(self, batch: list[PendingWrite]) -> list:
+        db = await self._connect()
+        results: list = []
+        started = time.perf_counter()
+        await db.execute("BEGIN")
+        try:
+            for write in batch:
+                await db.execute("SAVEPOINT stmt")
+                statement_started = time.perf_counter()
+                try:
+                    cursor = await db.execute(write.sql, write.params)
+                    result = await cursor.fetchall() if write.fetch else cursor.lastrowid
+                    DB_QUERY_SECONDS.labels(query_label(write.sql)).observe(time.perf_counter() - statement_started)
+                except aiosqlite.OperationalError as e:
+                    if "database is locked" in str(e).lower():
+                        raise  # whole batch is retried
+                    await db.execute("ROLLBACK TO stmt")
+                    results.append(e)
+                except aiosqlite.Error as e:
+                    await db.execute("ROLLBACK TO stmt")
+                    results.append(e)
+                else:
+                    results.append(result)
+                await db.execute("RELEASE stmt")
+            await db.commit()
+            DB_COMMIT_SECONDS.observe(time.perf_counter() - started)
+        except BaseException:
+            await db.rollback()
+            raise
+        return results
@@ -0,0 +1,127 @@
+"""
+Per-handler latency: every instrumented handler call runs in a span (a contextvar), and the DB layer,
+the Bot API request object and the per-user rate limiter add their time to the current span. Time not
+spent in any of them is counted as compute. Results go to the handler metrics in metrics.py; slow calls
+are logged, a sampled share of them with a trace of the individual DB / API / wait steps.
+"""
+import logging
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Iterable, Iterator
+
+from telegram.ext import Application, BaseHandler, CommandHandler, ConversationHandler
+from telegram.request import HTTPXRequest
+
+from config import HANDLER_SLOW_THRESHOLD, HANDLER_TRACE_SAMPLE
+from metrics import HANDLER_PART_SECONDS, HANDLER_SECONDS
+
+PARTS = ("db", "api", "wait")
+MAX_TRACE_EVENTS = 50
+# Parameterised callback keys collapse into one series per family
+_KEY_FAMILIES = re.compile(r"^(toggle|base|unbase|pay|donate|cancel_personal_plan|cancel_alert)_.+$")
+
+
+@dataclass(slots=True)
+class HandlerSpan:
+    name: str
+    started: float = field(default_factory=time.perf_counter)
+    parts: dict[str, float] = field(default_factory=lambda: dict.fromkeys(PARTS, 0.0))
+    trace: list[tuple[float, str, str, float]] | None = None  # (offset, part, label, seconds) when sampled
+
+
+_CURRENT: ContextVar[HandlerSpan | None] = ContextVar("handler_span", default=None)
+
+
+def handler_key(callback_data: str | None, known: Iterable[str] = ()) -> str:
+    """Metric label for a callback key: `toggle_USD` -> `toggle_*`; keys nobody handles -> `unknown`."""
+    if not callback_data:
+        return "unknown"
+    family = _KEY_FAMILIES.match(callback_data)
+    if family:
+        return f"{family.group(1)}_*"
+    return callback_data if callback_data in known else "unknown"
+
+
+def account(part: str, seconds: float, label: str = "") -> None:
+    """Add time spent in `part` (db / api / wait) to the running handler span, if any."""
+    span = _CURRENT.get()
+    if span is None:
+        return
+    span.parts[part] += seconds
+    if span.trace is not None and len(span.trace) < MAX_TRACE_EVENTS:
+        span.trace.append((time.perf_counter() - span.started - seconds, part, label, seconds))
+
+
+@contextmanager
+def handler_span(name: str) -> Iterator[HandlerSpan]:
+    span = HandlerSpan(name, trace=[] if random.random() < HANDLER_TRACE_SAMPLE else None)
+    token = _CURRENT.set(span)
+    try:
+        yield span
+    finally:
+        _CURRENT.reset(token)
+        _finish(span, time.perf_counter() - span.started)
+
+
+def _finish(span: HandlerSpan, total: float) -> None:
+    HANDLER_SECONDS.labels(span.name).observe(total)
+    compute = max(total - sum(span.parts.values()), 0.0)
+    for part, seconds in (*span.parts.items(), ("compute", compute)):
+        HANDLER_PART_SECONDS.labels(span.name, part).inc(seconds)
+    if total < HANDLER_SLOW_THRESHOLD:
+        return
+    breakdown = " ".join(f"{part}={seconds * 1e3:.0f}ms" for part, seconds in span.parts.items())
+    logging.warning("🐢 Slow handler %s: %.0f ms (%s compute=%.0fms)", span.name, total * 1e3, breakdown, compute * 1e3)
+    for offset, part, label, seconds in span.trace or ():
+        logging.warning("🐢   +%6.0f ms %-4s %-32s %.1f ms", offset * 1e3, part, label, seconds * 1e3)
+
+
+def timed(callback, name: str):
+    """Wrap a PTB handler callback so each call runs in a span named `name`."""
+    @wraps(callback)
+    async def wrapper(update, context):
+        with handler_span(name):
+            return await callback(update, context)
+    wrapper.span_name = name
+    return wrapper
+
+
+def instrument_application(app: Application, skip: Iterable = ()) -> None:
+    """
+    Time every registered handler callback, including those inside ConversationHandlers.
+    Callbacks in `skip` time themselves (e.g. the button router, which labels spans per callback key).
+    """
+    skip = set(skip)
+    for handlers in app.handlers.values():
+        for handler in handlers:
+            _instrument(handler, skip)
+
+
+def _instrument(handler: BaseHandler, skip: set) -> None:
+    if isinstance(handler, ConversationHandler):
+        for inner in (*handler.entry_points, *(h for hs in handler.states.values() for h in hs), *handler.fallbacks):
+            _instrument(inner, skip)
+        return
+    if handler.callback in skip or hasattr(handler.callback, "span_name"):  # shared or already wrapped
+        return
+    if isinstance(handler, CommandHandler):
+        name = "/" + sorted(handler.commands)[0]
+    else:
+        name = handler.callback.__name__
+    handler.callback = timed(handler.callback, name)
+
+
+class TimedRequest(HTTPXRequest):
+    """Bot API transport that books each call's time on the current handler span as `api`."""
+
+    async def do_request(self, url: str, method: str, *args, **kwargs) -> tuple[int, bytes]:
+        started = time.perf_counter()
+        try:
+            return await super().do_request(url, method, *args, **kwargs)
+        finally:
+            account("api", time.perf_counter() - started, url.rsplit("/", 1)[-1])
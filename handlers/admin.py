@@ -0,0 +1,155 @@
+"""
+Admin-only diagnostics for the running process, each answered with a text document:
+
+    /profile [seconds]     cProfile the event loop thread for N seconds (default 30), then send the stats
+    /profile stop          stop a running session early
+    /memory [top]          tracemalloc top allocations (the first call starts tracing, later calls report)
+    /memory stop           stop tracing and free its bookkeeping
+    /tasks                 asyncio tasks grouped by coroutine
+
+Nothing is active until an admin asks for it: no profiler hook, no allocation tracing.
+"""
+import asyncio
+import cProfile
+import io
+import pstats
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+
+from telegram import Update
+from telegram.ext import CallbackContext
+
+from config import PROFILE_DEFAULT_SECONDS, PROFILE_MAX_SECONDS
+
+PROFILE_JOB = "admin_profile"
+MEMORY_TOP_DEFAULT = 25
+
+_PROFILER: cProfile.Profile | None = None
+_PROFILE_STARTED: datetime | None = None
+_MEMORY_BASELINE: tracemalloc.Snapshot | None = None
+
+
+async def send_report(context: CallbackContext, chat_id: int, name: str, text: str, caption: str) -> None:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    await context.bot.send_document(
+        chat_id=chat_id,
+        document=io.BytesIO(text.encode("utf-8")),
+        filename=f"{name}-{stamp}.txt",
+        caption=caption,
+    )
+
+
+async def profile_command(update: Update, context: CallbackContext) -> None:
+    global _PROFILER, _PROFILE_STARTED
+    chat_id = update.effective_chat.id
+    arg = context.args[0].lower() if context.args else ""
+
+    if arg == "stop":
+        if _PROFILER is None:
+            await update.message.reply_text("No profiling session is running.")
+            return
+        for job in context.job_queue.get_jobs_by_name(PROFILE_JOB):
+            job.schedule_removal()
+        await _finish_profile(context, chat_id)
+        return
+
+    if _PROFILER is not None:
+        await update.message.reply_text("A profiling session is already running – /profile stop ends it.")
+        return
+    try:
+        seconds = min(int(arg), PROFILE_MAX_SECONDS) if arg else PROFILE_DEFAULT_SECONDS
+    except ValueError:
+        await update.message.reply_text("Usage: /profile [seconds] or /profile stop")
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:  # another profiler is already hooked into this thread
+        await update.message.reply_text(f"Cannot start profiling: {e}")
+        return
+    _PROFILER, _PROFILE_STARTED = profiler, datetime.now(timezone.utc)
+    context.job_queue.run_once(_profile_timeout, seconds, chat_id=chat_id, name=PROFILE_JOB)
+    await update.message.reply_text(f"⏱️ Profiling for {seconds} s …")
+
+
+async def _profile_timeout(context: CallbackContext) -> None:
+    await _finish_profile(context, context.job.chat_id)
+
+
+async def _finish_profile(context: CallbackContext, chat_id: int) -> None:
+    global _PROFILER, _PROFILE_STARTED
+    profiler, started = _PROFILER, _PROFILE_STARTED
+    if profiler is None:
+        return
+    profiler.disable()
+    _PROFILER = _PROFILE_STARTED = None
+
+    elapsed = (datetime.now(timezone.utc) - started).total_seconds()
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out).strip_dirs()
+    out.write(f"cProfile of the event loop thread, {elapsed:.1f} s\n\n== by cumulative time ==\n")
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(60)
+    out.write("\n== by own time ==\n")
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(40)
+    await send_report(context, chat_id, "profile", out.getvalue(), f"⏱️ Profile ({elapsed:.0f} s)")
+
+
+async def memory_command(update: Update, context: CallbackContext) -> None:
+    global _MEMORY_BASELINE
+    arg = context.args[0].lower() if context.args else ""
+
+    if arg == "stop":
+        tracemalloc.stop()
+        _MEMORY_BASELINE = None
+        await update.message.reply_text("🧠 Allocation tracing stopped.")
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _MEMORY_BASELINE = tracemalloc.take_snapshot()
+        await update.message.reply_text("🧠 Allocation tracing started – send /memory again for a snapshot, "
+                                        "/memory stop when done.")
+        return
+    try:
+        top = int(arg) if arg else MEMORY_TOP_DEFAULT
+    except ValueError:
+        await update.message.reply_text("Usage: /memory [top] or /memory stop")
+        return
+
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"Traced: {current / 2**20:.1f} MiB now, {peak / 2**20:.1f} MiB peak\n", "== top allocations =="]
+    lines += [str(stat) for stat in snapshot.statistics("lineno")[:top]]
+    if _MEMORY_BASELINE is not None:
+        lines += ["", "== growth since tracing started =="]
+        lines += [str(stat) for stat in snapshot.compare_to(_MEMORY_BASELINE, "lineno")[:top]]
+    await send_report(context, update.effective_chat.id, "memory", "\n".join(lines),
+                      f"🧠 {current / 2**20:.1f} MiB traced")
+
+
+def _coroutine_name(task: asyncio.Task) -> str:
+    coro = task.get_coro()
+    return getattr(coro, "__qualname__", None) or type(coro).__name__
+
+
+async def tasks_command(update: Update, context: CallbackContext) -> None:
+    tasks = asyncio.all_tasks()
+    by_coro = Counter(_coroutine_name(task) for task in tasks)
+    lines = [f"{len(tasks)} asyncio tasks\n", f"{'count':>6}  coroutine"]
+    lines += [f"{count:>6}  {name}" for name, count in by_coro.most_common()]
+
+    lines += ["", "== one stack per coroutine =="]
+    seen = set()
+    for task in tasks:
+        name = _coroutine_name(task)
+        if name in seen:
+            continue
+        seen.add(name)
+        stack = io.StringIO()
+        task.print_stack(limit=8, file=stack)
+        lines += [f"--- {name} ({task.get_name()})", stack.getvalue().rstrip()]
+    await send_report(context, update.effective_chat.id, "tasks", "\n".join(lines), f"🧵 {len(tasks)} tasks")
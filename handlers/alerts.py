@@ -0,0 +1,167 @@
+import math
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import (
+    CallbackContext,
+    CallbackQueryHandler,
+    CommandHandler,
+    ConversationHandler,
+    MessageHandler,
+    filters,
+)
+
+from config import FREE_TIER, TIERS, TierConvertFromNumber
+from db.db import (
+    add_price_alert,
+    count_price_alerts,
+    delete_price_alert,
+    get_price_alerts,
+    get_user_tier,
+)
+from handlers.price import get_price_snapshot
+from keyboard import build_alert_currency_keyboard, build_alerts_keyboard
+from util import delete_tracked_messages, safe_convo_step, send_or_edit
+
+CHOOSE_CURRENCY, ENTER_THRESHOLD = range(2)
+
+
+async def open_alerts_menu(update: Update, context: CallbackContext) -> None:
+    reply_markup = build_alerts_keyboard()
+
+    await send_or_edit(
+        update,
+        "🚨 *Price Alerts*\n\n"
+        "Get a message as soon as BTC crosses a price you choose (e.g. 70,000 USD).\n"
+        "Each alert fires once and is then removed.\n\n"
+        "Choose an option below:",
+        parse_mode="Markdown",
+        reply_markup=reply_markup,
+    )
+
+
+async def view_alerts(update: Update, context: CallbackContext) -> None:
+    user_id = update.effective_user.id
+    alerts = await get_price_alerts(user_id)
+
+    if not alerts:
+        message = (
+            "ℹ️ You don’t have any price alerts yet.\n\n"
+            "Use ➕ *Add Alert* to create one."
+        )
+        buttons = []
+    else:
+        message = "📋 *Your Price Alerts:*\n\nTap an alert to cancel it."
+        buttons = [
+            [InlineKeyboardButton(f"❌ BTC crosses {threshold:,.0f} {currency.upper()}",
+                                  callback_data=f"cancel_alert_{alert_id}")]
+            for alert_id, currency, threshold in alerts
+        ]
+
+    buttons.append([InlineKeyboardButton("⬅️ Back", callback_data="open_alerts_menu")])
+    await send_or_edit(update, message, parse_mode="Markdown", reply_markup=InlineKeyboardMarkup(buttons))
+
+
+async def cancel_alert(update: Update, context: CallbackContext) -> None:
+    alert_id = int(update.callback_query.data.split("_")[-1])
+
+    await delete_price_alert(alert_id, update.effective_user.id)
+
+    await send_or_edit(update, "✅ Alert cancelled.")
+    await open_alerts_menu(update, context)
+
+
+@safe_convo_step(menu_func=open_alerts_menu)
+async def add_alert_start(update: Update, context: CallbackContext) -> int:
+    user_id = update.effective_user.id
+    # Validate tier
+    tier = await get_user_tier(user_id)
+    max_alerts = TIERS.get(TierConvertFromNumber(tier), FREE_TIER).mx_price_alerts
+
+    if await count_price_alerts(user_id) >= max_alerts:
+        await send_or_edit(update,
+                           f"❌ You’ve reached your limit of {max_alerts} price alert(s).\n"
+                           "Cancel an alert or upgrade your tier to add more.",
+                           reply_markup=InlineKeyboardMarkup([
+                               [InlineKeyboardButton("💳 Upgrade", callback_data="open_upgrade_menu")],
+                               [InlineKeyboardButton("⬅️ Back", callback_data="open_alerts_menu")]
+                           ])
+                           )
+        return ConversationHandler.END
+
+    msg = await send_or_edit(update, "💱 Choose the currency for your alert:",
+                             reply_markup=build_alert_currency_keyboard())
+    context.user_data["wizard_msg_id"] = msg.message_id
+    return CHOOSE_CURRENCY
+
+
+@safe_convo_step(menu_func=open_alerts_menu)
+async def add_alert_currency(update: Update, context: CallbackContext) -> int:
+    currency = update.callback_query.data.removeprefix("alert_cur_")
+    context.user_data["alert_currency"] = currency
+
+    snapshot = await get_price_snapshot()
+    current = snapshot.data.get(currency.lower()) if snapshot else None
+    hint = f"💰 Current price: {current:,} {currency}\n\n" if current is not None else ""
+
+    await send_or_edit(
+        update,
+        f"{hint}🎯 Enter the *{currency}* price that should trigger the alert (e.g. 70000):",
+        parse_mode="Markdown",
+        reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("❌ Cancel", callback_data="cancel_add_alert")]]),
+    )
+    return ENTER_THRESHOLD
+
+
+@safe_convo_step(menu_func=open_alerts_menu)
+async def add_alert_threshold(update: Update, context: CallbackContext) -> int:
+    context.user_data.setdefault("temporary_msg_ids", []).append(update.message.message_id)
+
+    text = update.message.text.strip().replace(",", "").replace(" ", "")
+    try:
+        threshold = float(text)
+    except ValueError:
+        threshold = math.nan
+    if not math.isfinite(threshold) or threshold <= 0:  # "inf" / "nan" parse, but could never fire
+        msg = await send_or_edit(update, "❌ Please enter a positive number (e.g. 70000).")
+        context.user_data.setdefault("temporary_msg_ids", []).append(msg.message_id)
+        return ENTER_THRESHOLD
+
+    currency = context.user_data["alert_currency"]
+    await add_price_alert(update.effective_user.id, currency, threshold)
+
+    await send_or_edit(
+        update,
+        f"✅ Alert saved: BTC crosses *{threshold:,.0f} {currency}*.",
+        reply_markup=build_alerts_keyboard(),
+        parse_mode="Markdown",
+    )
+    context.user_data.setdefault("temporary_msg_ids", []).append(context.user_data["wizard_msg_id"])
+    await delete_tracked_messages(bot=context.bot, chat_id=update.effective_chat.id, user_data=context.user_data)
+    return ConversationHandler.END
+
+
+@safe_convo_step(menu_func=open_alerts_menu)
+async def cancel_add_alert(update: Update, context: CallbackContext) -> int:
+    await delete_tracked_messages(bot=context.bot, chat_id=update.effective_chat.id, user_data=context.user_data)
+    await send_or_edit(update, "❌ Action cancelled.")
+    await open_alerts_menu(update, context)
+    return ConversationHandler.END
+
+
+add_alert_conversation_handler = ConversationHandler(
+    entry_points=[
+        CallbackQueryHandler(add_alert_start, pattern="^add_alert$"),
+        CommandHandler("add_alert", add_alert_start),
+    ],
+    states={
+        CHOOSE_CURRENCY: [
+            CallbackQueryHandler(add_alert_currency, pattern="^alert_cur_[A-Z]+$"),
+        ],
+        ENTER_THRESHOLD: [
+            MessageHandler(filters.TEXT & ~filters.COMMAND, add_alert_threshold),
+        ],
+    },
+    fallbacks=[
+        CallbackQueryHandler(cancel_add_alert, pattern="^cancel_add_alert$"),
+    ],
+)
@@ -13,7 +13,8 @@ async def start_command(update: Update, context: CallbackContext) -> None:
         "🔹 Choose your preferred currencies\n"
         "🔹 Get automatic price updates\n"
         "   • Base Plan (UTC-based)\n"
-        "   • Personal Plan (local time)\n\n"
+        "   • Personal Plan (local time)\n"
+        "🔹 Get alerted when BTC crosses a price\n\n"
         "👇 Use the buttons below to explore:"
     )
 
@@ -39,6 +40,9 @@ async def help_command(update: Update, context: CallbackContext) -> None:
                        "/personal – Manage your custom BTC alerts\n"
                        "Set, view, or remove *local-time* subscriptions.\n\n"
 
+                       "<b>🚨 Price Alerts:</b>\n"
+                       "/alerts – Get notified when BTC crosses a price\n\n"
+
                        "<b>💳 Account & Settings:</b>\n"
                        "/upgrade – Learn about Pro/Ultra tiers\n"
                        "/timezone – Set your local time zone\n"
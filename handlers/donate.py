@@ -1,8 +1,7 @@
-from time import time
-
 from telegram import LabeledPrice, Update
 from telegram.ext import CallbackContext, ContextTypes
 
+from clock import CLOCK
 from config import TIERS, TierConvertFromNumber
 from handlers.core import open_main_menu
 from keyboard import build_donate_keyboard
@@ -34,7 +33,7 @@ async def send_invoice_donate(update: Update, context: CallbackContext, tier_typ
 
     operation_type = "donation"
     payload = (f"operation_type={operation_type}&tier={tier.name.lower()}&provider={provider}"
-               f"&user={user_id}&timestamp={int(time())}")
+               f"&user={user_id}&timestamp={int(CLOCK.time())}")
 
     msg = await context.bot.send_invoice(
         chat_id=user_id,
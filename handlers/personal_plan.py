@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta, timezone
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
@@ -10,6 +10,7 @@ from telegram.ext import (
     filters,
 )
 
+from clock import CLOCK
 from config import FREE_TIER, PRO_TIER, TIERS, ULTRA_TIER, TierConvertFromNumber
 from db.db import (
     add_personal_plan,
@@ -19,6 +20,7 @@ from db.db import (
     get_user_tier,
     get_user_timezone,
 )
+from db.plan_index import epoch_minute, from_epoch_minute
 from handlers.timezone import open_time_settings_menu
 from keyboard import build_personal_sub_keyboard
 from util import (
@@ -59,11 +61,10 @@ async def view_personal_plans(update: Update, context: CallbackContext) -> None:
     else:
         tz_data = await get_user_timezone(user_id)
         rows = []
-        for idx, (plan_id, interval, next_iso) in enumerate(plans, 1):
-            first_dt_utc = datetime.fromisoformat(next_iso)
-            first_dt_local = convert_utc_to_local(first_dt_utc, tz_data)
+        for idx, plan in enumerate(plans, 1):
+            first_dt_local = convert_utc_to_local(from_epoch_minute(plan.first_fire_min), tz_data)
             formatted_time = first_dt_local.strftime("%H:%M %d.%m.%y")
-            rows.append(f"{idx}. ⏱ Every {interval} min, start: {formatted_time}")
+            rows.append(f"{idx}. ⏱ Every {plan.interval} min, start: {formatted_time}")
 
         message = "📋 *Your Personal BTC Plans:*\n\n" + "\n".join(rows)
 
@@ -184,14 +185,14 @@ async def add_personal_start_time(update: Update, context: CallbackContext) -> i
 
     # 🔄 Load user tz & compute first_fire in UTC
     tz_data = await get_user_timezone(user_id)
-    utc_now = datetime.now(timezone.utc)
+    utc_now = CLOCK.now()
     local_now = convert_utc_to_local(utc_now, tz_data)
     first_local = local_now.replace(hour=hour, minute=minute, second=0, microsecond=0)
     if first_local <= local_now:  # already passed today → tomorrow
         first_local += timedelta(days=1)
 
     first_fire = convert_local_to_utc(first_local, tz_data)
-    await add_personal_plan(user_id, interval, first_fire.isoformat(" "))
+    await add_personal_plan(user_id, interval, epoch_minute(first_fire.replace(tzinfo=timezone.utc)))
 
     await send_or_edit(
         update,
@@ -224,14 +225,13 @@ async def open_cancel_personal_menu(update: Update, context: CallbackContext):
     message = "🗑️ Select a plan to cancel:"
     buttons = []
     tz_data = await get_user_timezone(user_id)
-    for plan_id, interval, first_fire_time in plans:
-        first_dt_utc = datetime.fromisoformat(first_fire_time)
-        first_dt_local = convert_utc_to_local(first_dt_utc, tz_data)
+    for plan in plans:
+        first_dt_local = convert_utc_to_local(from_epoch_minute(plan.first_fire_min), tz_data)
         formatted_time = first_dt_local.strftime("%H:%M %d.%m.%y")
         buttons.append([
             InlineKeyboardButton(
-                f"❌ ⏱ Every {interval} min, {formatted_time} ",
-                callback_data=f"cancel_personal_plan_{plan_id}"
+                f"❌ ⏱ Every {plan.interval} min, {formatted_time} ",
+                callback_data=f"cancel_personal_plan_{plan.id}"
             )
         ])
 
@@ -1,15 +1,22 @@
 import asyncio
+import logging
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Any
 
 import aiohttp
 from telegram import Update
 from telegram.ext import CallbackContext
 
-from config import BLOCKCHAIN_API, COINGECKO_API, CURRENCIES, FETCH_INTERVAL
+from clock import CLOCK
+from config import FETCH_INTERVAL, PRICE_MAX_STALENESS
+from db.price_store import record_tick
 from keyboard import build_price_keyboard
-from util import fetch_json, format_price_message, get_http_session, send_or_edit
+from metrics import PRICE_CACHE_REQUESTS, PRICE_REFRESH_SECONDS
+from services.alerts import process_price_alerts
+from services.price_history import PRICE_HISTORY
+from services.price_sources import fetch_prices
+from util import format_price_message, get_http_session, send_or_edit
 
 
 @dataclass(slots=True)
@@ -17,9 +24,20 @@ class PriceCache:
     data: dict[str, Any]
     ts: datetime
 
+    @property
+    def age(self) -> float:
+        """Seconds since this quote was fetched."""
+        return (CLOCK.now() - self.ts).total_seconds()
+
+    @property
+    def is_stale(self) -> bool:
+        """Older than PRICE_MAX_STALENESS – users must be told the data is outdated."""
+        return self.age > PRICE_MAX_STALENESS
+
 
 PRICE_CACHE: PriceCache | None = None
 CACHE_LOCK = asyncio.Lock()
+_REFRESH_TASK: asyncio.Task | None = None
 
 
 # Function-helper for price command and price button functions
@@ -35,87 +53,88 @@ async def refresh_price_click(update: Update, context: CallbackContext) -> None:
 
 async def _show_price(update: Update, context: CallbackContext) -> None:
     """Fetch BTC price once and display it (new msg or edit-in-place)."""
-    price_data = await get_btc_price()
+    snapshot = await get_price_snapshot()
     user_id = update.effective_user.id
 
     # target = update.message or update.callback_query.message # ✅ supports both command and button
 
-    if not price_data:
+    if not snapshot:
         await send_or_edit(update, "❌ Failed to fetch BTC price. Please try again later.")
         return
 
-    message = await format_price_message(price_data, user_id)
+    message = await format_price_message(snapshot.data, user_id, stale_age=stale_age(snapshot))
     reply_markup = build_price_keyboard("🔄 Refresh Price", "refresh_price")
 
     await send_or_edit(update, message, parse_mode="Markdown", reply_markup=reply_markup)
 
 
-async def get_btc_price() -> dict | None:
-    """Return cached BTC price if fresh, otherwise refetch"""
+async def get_price_snapshot() -> PriceCache | None:
+    """Return the last good quote together with its timestamp; None only if nothing was ever fetched."""
     session = await get_http_session()
     return await _fetch_and_cache(session)
 
 
-async def _fetch_and_cache(session: aiohttp.ClientSession) -> dict | None:
+def stale_age(snapshot: PriceCache) -> float | None:
+    """Age to report to users, or None while the quote is within PRICE_MAX_STALENESS."""
+    return snapshot.age if snapshot.is_stale else None
+
+
+async def _fetch_and_cache(session: aiohttp.ClientSession) -> PriceCache | None:
     """
-    Return cached price if it is still fresh; otherwise fetch a new one and
-    update the global cache.  A lock guarantees that only ONE coroutine performs
-    the slow network fetch, even under heavy concurrent load.
+    Stale-while-revalidate: a cached quote is returned immediately, even if it is
+    older than FETCH_INTERVAL – in that case a single background refresh is started.
+    Callers only wait on the network when there is no quote at all (cold start).
     """
-    global PRICE_CACHE
-    # FAST PATH – no locking if data is already fresh
-    if PRICE_CACHE and (datetime.now(timezone.utc) - PRICE_CACHE.ts).total_seconds() < FETCH_INTERVAL:
-        return PRICE_CACHE.data
+    if PRICE_CACHE:
+        if PRICE_CACHE.age >= FETCH_INTERVAL:
+            PRICE_CACHE_REQUESTS.labels("stale").inc()
+            _schedule_refresh(session)
+        else:
+            PRICE_CACHE_REQUESTS.labels("hit").inc()
+        return PRICE_CACHE
+    PRICE_CACHE_REQUESTS.labels("miss").inc()
+    return await _refresh_cache(session)
 
-        # SLOW PATH – may need to refresh; take the lock
-    async with CACHE_LOCK:  # suspend until lock is free
-        #      re-check staleness because another coroutine might have refreshed
-        #      while we were waiting.
-        if PRICE_CACHE and (datetime.now(timezone.utc) - PRICE_CACHE.ts).total_seconds() < FETCH_INTERVAL:
-            return PRICE_CACHE.data
 
-        coingecko_task = asyncio.create_task(get_price_coingecko(session))
-        blockchain_task = asyncio.create_task(get_price_blockchain(session))
-        coingecko_data, blockchain_data = await asyncio.gather(
-            coingecko_task, blockchain_task, return_exceptions=True
-        )
+def _schedule_refresh(session: aiohttp.ClientSession) -> None:
+    global _REFRESH_TASK
+    if _REFRESH_TASK is None or _REFRESH_TASK.done():
+        _REFRESH_TASK = asyncio.create_task(_refresh_cache(session))
 
-        data = None
-        if coingecko_data and not isinstance(coingecko_data, Exception):
-            data = coingecko_data
-        elif blockchain_data and not isinstance(blockchain_data, Exception):
-            data = blockchain_data
-
-        if data:
-            PRICE_CACHE = PriceCache(data, datetime.now(timezone.utc))
 
+async def _refresh_cache(session: aiohttp.ClientSession, force: bool = False) -> PriceCache | None:
+    """
+    Fetch a new quote and update the global cache. A lock guarantees that only ONE
+    coroutine performs the slow network fetch. On failure the last good quote is kept.
+    `force` skips the freshness check: the scheduled job must record a tick every interval.
+    """
+    global PRICE_CACHE
+    async with CACHE_LOCK:  # suspend until lock is free
+        #      re-check staleness because another coroutine might have refreshed
+        #      while we were waiting.
+        if not force and PRICE_CACHE and PRICE_CACHE.age < FETCH_INTERVAL:
+            return PRICE_CACHE
+
+        with PRICE_REFRESH_SECONDS.time():
+            data = await fetch_prices(session)
+        if not data:
+            if PRICE_CACHE:
+                logging.warning("Price refresh failed – serving cached quote (%.0f s old)", PRICE_CACHE.age)
+            return PRICE_CACHE
+        snapshot = PRICE_CACHE = PriceCache(data, CLOCK.now())
+        PRICE_HISTORY.record(snapshot.ts.timestamp(), data)
+        record_tick(snapshot.ts.timestamp(), data)
         # leaving the `async with` block automatically releases the lock.
-        return data
-
-
-async def get_price_blockchain(session: aiohttp.ClientSession) -> dict | None:
-    """Fetch BTC price from Blockchain (multiple currencies)."""
-    data = await fetch_json(session, BLOCKCHAIN_API)
-
-    if data:
-        prices = {
-            currency.lower(): round(info["last"])
-            for currency, info in data.items()
-            if currency in CURRENCIES
-        }
-        return prices
-    return None
-
-
-async def get_price_coingecko(session: aiohttp.ClientSession) -> dict | None:
-    """Fetch BTC price from CoinGecko (multiple currencies)."""
-    data = await fetch_json(session, COINGECKO_API)
 
-    if data and "bitcoin" in data:
-        return data["bitcoin"]
-    return None
+    # Every stored quote is checked – job or read-triggered refresh. Outside the lock, since
+    # sending fired alerts can take a while.
+    try:
+        await process_price_alerts(data)
+    except Exception as e:
+        logging.exception(f"Price alert check failed: {e}")
+    return snapshot
 
 
 async def refresh_price_cache(context: CallbackContext) -> None:
     session = await get_http_session()
-    await _fetch_and_cache(session)
+    await _refresh_cache(session, force=True)  # job jitter would otherwise skip every other tick
@@ -1,6 +1,5 @@
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 
-import pytz
 from telegram import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
@@ -17,10 +16,12 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
-from timezonefinder import TimezoneFinder
 
+from clock import CLOCK
 from db.db import get_user_timezone, set_user_timezone
 from keyboard import build_time_settings_keyboard
+from services.timezone_lookup import timezone_at
+from services.tz_offsets import UTC_OFFSETS
 from util import (
     delete_tracked_messages,
     format_utc_offset,
@@ -92,12 +93,11 @@ async def handle_location(update: Update, context: CallbackContext) -> int:
     user = update.effective_user
     location = update.message.location
 
-    tf = TimezoneFinder()
-    timezone_name = tf.timezone_at(lng=location.longitude, lat=location.latitude)
+    timezone_name = await timezone_at(location.latitude, location.longitude)
 
     if timezone_name:
-        offset = datetime.now(pytz.timezone(timezone_name)).utcoffset().total_seconds() // 60
-        await set_user_timezone(user.id, timezone_name, int(offset), "location")
+        offset = UTC_OFFSETS.offset_minutes(timezone_name, CLOCK.time())
+        await set_user_timezone(user.id, timezone_name, offset, "location")
 
         msg: Message = await send_or_edit(
             update,
@@ -164,7 +164,7 @@ async def process_manual_time(update: Update, context: CallbackContext) -> int:
 
 
 def calculate_offset(hour: int, minute: int) -> int:
-    now_utc = datetime.now(timezone.utc)
+    now_utc = CLOCK.now()
     local_candidate = now_utc.replace(hour=hour, minute=minute, second=0, microsecond=0)
     if local_candidate < now_utc:
         local_candidate += timedelta(days=1)
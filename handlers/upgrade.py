@@ -1,16 +1,18 @@
 import logging
 from datetime import datetime, timedelta, timezone
-from time import time
 
 from telegram import LabeledPrice, Update
 from telegram.ext import CallbackContext, ContextTypes
 
+from clock import CLOCK
 from config import EXPIRY_SECONDS, TIERS, TierConvertFromNumber
 from db.db import (
-    delete_personal_plan,
+    delete_personal_plans,
+    delete_price_alerts,
     downgrade_user,
     get_expired_subscriptions,
     get_personal_plans,
+    get_price_alerts,
     get_user_tier,
     update_user_tier,
 )
@@ -44,6 +46,7 @@ async def open_upgrade_menu(update: Update, context: CallbackContext) -> None:
             f"{tier.emoji} *{tier.name} Tier* – {tier.price['USD'].currency}{tier.price['USD'].amount} / month\n"
             f"  • {tier.mx_personal_plans} personal plans\n"
             f"  • Min interval: {tier.mn_interval} min\n"
+            f"  • {tier.mx_price_alerts} price alerts\n"
         )
     if not tier_suggestion_lines:
         tier_suggestion_lines.append("\n*🚀 You’re already on the highest tier. Thank you! 🙏*\n\n")
@@ -109,7 +112,7 @@ async def send_invoice_upgrade(update: Update, context: CallbackContext, tier_ty
 
     operation_type = "sub"
     payload = (f"operation_type={operation_type}&tier={tier.name.lower()}&provider={provider}"
-               f"&user={user_id}&timestamp={int(time())}")
+               f"&user={user_id}&timestamp={int(CLOCK.time())}")
     description = (
         f"{tier.name} features will be unlocked for 30 days.\n"
         f"Invoice is valid for {EXPIRY_SECONDS // 60} minutes and will automatically expire after that."
@@ -134,9 +137,8 @@ async def handle_successful_upgrade_payment(update: Update, context: ContextType
                                             user_id: int, new_tier: TierConvertFromNumber) -> None:
 
     # 3. Upgrade the user tier
-    expiry_dt = datetime.now(timezone.utc) + timedelta(days=SUB_DURATION_DAYS)
-    expiry_iso = expiry_dt.strftime("%Y-%m-%d %H:%M:%S")
-    await update_user_tier(user_id, new_tier, expiry_iso)
+    expiry_dt = CLOCK.now() + timedelta(days=SUB_DURATION_DAYS)
+    await update_user_tier(user_id, new_tier, int(expiry_dt.timestamp()))
 
     # 4. Confirm to user
     msg = await send_or_edit(update, "✅ Payment successful! Your subscription has been activated.")
@@ -150,17 +152,16 @@ async def handle_successful_upgrade_payment(update: Update, context: ContextType
 
 
 async def downgrade_expired_subscriptions(context: CallbackContext) -> None:
-    now = datetime.now(timezone.utc)
-    expired_users = await get_expired_subscriptions()
+    now_ts = int(CLOCK.time())
+    expired_users = await get_expired_subscriptions(now_ts)
 
-    for user_id, expiry_iso, tier in expired_users:
-        expiry_dt = datetime.fromisoformat(expiry_iso)
-        seconds_since_expiry = (now - expiry_dt).total_seconds()
-        seconds_left = GRACE_PERIOD - seconds_since_expiry
+    for user_id, expiry_ts, tier in expired_users:
+        seconds_left = GRACE_PERIOD - (now_ts - expiry_ts)
 
         if tier != TierConvertFromNumber.FREE:
-            await downgrade_user(user_id, expiry_iso)
-            logging.info(f"🔻 Downgraded user {user_id} (expired on {expiry_iso}).")
+            await downgrade_user(user_id, expiry_ts)
+            expired_on = datetime.fromtimestamp(expiry_ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            logging.info(f"🔻 Downgraded user {user_id} (expired on {expired_on}).")
             await context.bot.send_message(
                 chat_id=user_id,
                 text=(
@@ -192,17 +193,18 @@ async def prune_after_grace(context: CallbackContext) -> None:
         max_plans=tier_config.mx_personal_plans,
         min_interval=tier_config.mn_interval,
     )
+    await prune_price_alerts_for_tier(user_id=user_id, max_alerts=tier_config.mx_price_alerts)
 
     await context.bot.send_message(
         chat_id=user_id,
         text="ℹ️ Grace period ended.\n"
         "If you did not renew your subscription or proceeded with lower tier, "
-        "some personal plans could be disabled to match your current tier limits.",
+        "some personal plans or price alerts could be disabled to match your current tier limits.",
     )
 
     # 3) Finally clear subscription_end so this row is never seen again
     if current_tier == TierConvertFromNumber.FREE:
-        await update_user_tier(user_id, current_tier, expiry_date=None)
+        await update_user_tier(user_id, current_tier, expiry_ts=None)
     logging.info(f"✅ Pruned and cleared expiry for user {user_id}.")
 
 
@@ -210,17 +212,24 @@ async def prune_personal_plans_for_tier(user_id: int, max_plans: int, min_interv
     # Fetch all personal plans for the user
     plans = await get_personal_plans(user_id)
     valid_plans = []
+    to_remove = []
 
     # Step 1: Filter by min_interval
-    for plan_id, interval, _ in plans:
-        if interval < min_interval:
-            await delete_personal_plan(plan_id)
+    for plan in plans:
+        if plan.interval < min_interval:
+            to_remove.append(plan.id)
         else:
-            valid_plans.append((plan_id, interval))
-
-    # Step 2: Enforce max plan count
-    if len(valid_plans) > max_plans:
-        # Keep earliest plans, remove the rest
-        to_remove = valid_plans[max_plans:]
-        for plan_id, _ in to_remove:
-            await delete_personal_plan(plan_id)
+            valid_plans.append(plan.id)
+
+    # Step 2: Enforce max plan count – keep earliest plans, remove the rest
+    to_remove.extend(valid_plans[max_plans:])
+
+    if to_remove:
+        await delete_personal_plans(to_remove)
+
+
+async def prune_price_alerts_for_tier(user_id: int, max_alerts: int) -> None:
+    # Keep the earliest alerts, remove the rest
+    alerts = await get_price_alerts(user_id)
+    if len(alerts) > max_alerts:
+        await delete_price_alerts([alert_id for alert_id, _, _ in alerts[max_alerts:]])
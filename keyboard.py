@@ -10,6 +10,7 @@ def build_main_keyboard() -> InlineKeyboardMarkup:
         [InlineKeyboardButton("💱 Change Currency", callback_data="open_currency_menu")],
         [InlineKeyboardButton("🔔 Base Plan", callback_data="open_base_sub_menu")],
         [InlineKeyboardButton("📆 Personal Plan", callback_data="open_personal_sub_menu")],
+        [InlineKeyboardButton("🚨 Price Alerts", callback_data="open_alerts_menu")],
         [InlineKeyboardButton("🌍 Time Settings", callback_data="open_time_settings_menu")],
         [InlineKeyboardButton("☕ Donate", callback_data="open_donate_menu")],
     ]
@@ -67,6 +68,27 @@ def build_personal_sub_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+def build_alerts_keyboard() -> InlineKeyboardMarkup:
+    keyboard = [
+        [InlineKeyboardButton("📋 View My Alerts", callback_data="view_alerts")],
+        [InlineKeyboardButton("➕ Add Alert", callback_data="add_alert")],
+        [InlineKeyboardButton("💳 Upgrade", callback_data="open_upgrade_menu")],
+        [InlineKeyboardButton("⬅️ Back", callback_data="open_main_menu")],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+
+def build_alert_currency_keyboard() -> InlineKeyboardMarkup:
+    buttons = []
+    # Currency buttons (in rows of 3)
+    for i in range(0, len(CURRENCIES), 3):
+        buttons.append([
+            InlineKeyboardButton(currency, callback_data=f"alert_cur_{currency}") for currency in CURRENCIES[i: i + 3]
+        ])
+    buttons.append([InlineKeyboardButton("❌ Cancel", callback_data="cancel_add_alert")])
+    return InlineKeyboardMarkup(buttons)
+
+
 def build_time_settings_keyboard() -> InlineKeyboardMarkup:
     keyboard = [
         [InlineKeyboardButton("👁 View Current Time Settings", callback_data="view_time_settings")],
@@ -0,0 +1,273 @@
+"""
+In-process metrics in the Prometheus text format (no client library needed).
+
+Instruments are module-level singletons defined here, so the full catalogue is in one place;
+the modules they describe only call .inc() / .observe(). Values owned by other objects (cache
+sizes, limiter entries, ...) are read at scrape time through METRICS.callback().
+MetricsServer exposes everything on GET /metrics.
+"""
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from aiohttp import web
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TICK_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 10, 100, 1000, 10_000, 100_000)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self._children: dict[tuple[str, ...], object] = {}
+
+    def labels(self, *values) -> object:
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}, got {values}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> Iterator[str]:
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.label_names, key)} {child.value:g}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = buckets
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def samples(self) -> Iterator[str]:
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(child.buckets, child.counts):
+                cumulative += count
+                le = 'le="%g"' % bound
+                yield f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {child.count}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, key)} {child.sum:g}"
+            yield f"{self.name}_count{_format_labels(self.label_names, key)} {child.count}"
+
+
+class _Callback(_Metric):
+    """Read at scrape time: `collect()` returns a number, or {label values: number} for labelled metrics."""
+
+    def __init__(self, name: str, help_text: str, kind: str, collect: Callable[[], float | dict],
+                 labels: tuple[str, ...] = ()):
+        super().__init__(name, help_text, labels)
+        self.kind = kind
+        self.collect = collect
+
+    def samples(self) -> Iterator[str]:
+        values = self.collect()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in values.items():
+            key = key if isinstance(key, tuple) else (key,)
+            yield f"{self.name}{_format_labels(self.label_names, tuple(map(str, key)))} {value:g}"
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "btcbot_"):
+        self.prefix = prefix
+        self._metrics: dict[str, _Metric] = {}
+
+    def counter(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(self.prefix + name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self.prefix + name, help_text, labels, buckets))
+
+    def callback(self, name: str, help_text: str, collect: Callable[[], float | dict],
+                 labels: tuple[str, ...] = (), kind: str = "gauge") -> None:
+        self._register(_Callback(self.prefix + name, help_text, kind, collect, labels))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = list(metric.samples())
+            except Exception as e:  # a broken callback must not take the whole scrape down
+                logging.error("Metric %s failed to collect: %s", metric.name, e)
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric  # re-registering (e.g. a module reload) replaces the old one
+        return metric
+
+
+METRICS = MetricsRegistry()
+
+# Scheduler
+TICK_SECONDS = METRICS.histogram("scheduler_tick_seconds", "notify_subscribers run time", buckets=TICK_BUCKETS)
+TICK_LATENESS = METRICS.histogram(
+    "scheduler_tick_lateness_seconds", "Delay between the minute boundary and the tick start", buckets=TICK_BUCKETS
+)
+TICK_RECIPIENTS = METRICS.histogram(
+    "scheduler_tick_recipients", "Notifications queued per tick", buckets=COUNT_BUCKETS
+)
+
+# Price cache and sources
+PRICE_CACHE_REQUESTS = METRICS.counter(
+    "price_cache_requests_total", "Price snapshot lookups by result (hit, stale, miss)", ("result",)
+)
+PRICE_REFRESH_SECONDS = METRICS.histogram("price_refresh_seconds", "Price cache refresh time (all sources)")
+SOURCE_FETCH_SECONDS = METRICS.histogram("price_source_fetch_seconds", "Fetch time per price source", ("source",))
+SOURCE_FETCH_RESULTS = METRICS.counter(
+    "price_source_fetches_total", "Price source fetches by outcome (ok, error)", ("source", "outcome")
+)
+PRICE_TICK_GAPS = METRICS.counter("price_tick_gaps_total", "Minutes without a price tick in the history DB")
+HTTP_FETCH_ERRORS = METRICS.counter("http_fetch_errors_total", "fetch_json failures by host and kind", ("host", "kind"))
+
+# Database
+DB_QUERY_SECONDS = METRICS.histogram("db_query_seconds", "Statement time (reads include fetching rows)", ("query",))
+DB_COMMIT_SECONDS = METRICS.histogram("db_commit_seconds", "Write transaction time (group commit batch or single)")
+
+# Sends
+MESSAGES_SENT = METRICS.counter("messages_sent_total", "Broadcast messages delivered")
+MESSAGES_FAILED = METRICS.counter("messages_failed_total", "Broadcast messages given up on, by error", ("error",))
+MESSAGE_RETRIES = METRICS.counter("message_retries_total", "Broadcast send retries (flood control, network)")
+RATE_LIMIT_WAIT = METRICS.histogram(
+    "rate_limit_wait_seconds", "Time spent waiting for a rate limiter", ("limiter",)
+)
+
+# Interactive handlers (see handler_timing.py); button keys are aggregated per family, e.g. toggle_*
+HANDLER_SECONDS = METRICS.histogram("handler_seconds", "Handler latency per command / callback key", ("handler",))
+HANDLER_PART_SECONDS = METRICS.counter(
+    "handler_part_seconds_total", "Handler time split into db, api, wait and compute", ("handler", "part")
+)
+
+
+class MetricsServer:
+    """Serves METRICS on GET /metrics (Prometheus text format 0.0.4)."""
+
+    def __init__(self, registry: MetricsRegistry = METRICS):
+        self.registry = registry
+        self._runner: web.AppRunner | None = None
+        self.web_app = web.Application()
+        self.web_app.router.add_get("/metrics", self._handle_metrics)
+
+    async def start(self, host: str, port: int) -> None:
+        self._runner = web.AppRunner(self.web_app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logging.info("📈 Metrics on http://%s:%s/metrics", host, port)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode(), headers={"Content-Type": CONTENT_TYPE})
@@ -0,0 +1,63 @@
+import logging
+
+from telegram import Bot
+
+from db.alert_index import ALERT_INDEX, PriceAlert
+from db.db import delete_price_alerts
+from services.broadcast import BROADCAST_ENGINE
+
+_LAST_PRICES: dict[str, float] = {}  # last price each currency was checked against
+_BOT: Bot | None = None  # sends fired alerts; set by start_price_alerts()
+
+
+def start_price_alerts(bot: Bot) -> None:
+    """Check every new price from now on and send fired alerts with `bot` (the broadcast bot)."""
+    global _BOT
+    _BOT = bot
+
+
+def format_alert_message(alert: PriceAlert, price: float, rising: bool) -> str:
+    direction = "rose above" if rising else "fell below"
+    currency = alert.currency.upper()
+    return (
+        "🚨 *Price Alert* 🚨\n\n"
+        f"BTC {direction} *{alert.threshold:,.0f} {currency}*.\n"
+        f"💰 Now: {price:,} {currency}"
+    )
+
+
+async def process_price_alerts(prices: dict[str, float]) -> None:
+    """
+    Fire every alert crossed between the previously checked price and `prices`; a no-op until
+    start_price_alerts() has been called.
+    Fired alerts are removed in batched writes and sent through the broadcast engine; alerts whose
+    rows could not be deleted go back into the index and are checked again on the next tick.
+    """
+    if _BOT is None:
+        return
+    fired: list[tuple[PriceAlert, float, bool]] = []
+    checked: dict[str, float | None] = {}
+    for currency, price in prices.items():
+        prev = checked[currency] = _LAST_PRICES.get(currency)
+        _LAST_PRICES[currency] = price
+        if prev is None:
+            continue  # first tick after start-up – nothing to compare with
+        rising = price > prev
+        fired.extend((alert, price, rising) for alert in ALERT_INDEX.pop_crossed(currency, prev, price))
+
+    if not fired:
+        return
+
+    logging.info(f"🚨 {len(fired)} price alerts crossed.")
+    kept = set(await delete_price_alerts([alert.id for alert, _, _ in fired]))
+    if kept:  # still in the database – back into the index, to be checked again on the next tick
+        for alert, _, _ in fired:
+            if alert.id in kept:
+                ALERT_INDEX.add(alert)
+        for currency, prev in checked.items():
+            if prev is not None:
+                _LAST_PRICES[currency] = prev
+        fired = [item for item in fired if item[0].id not in kept]
+    await BROADCAST_ENGINE.send_all(
+        _BOT, ((alert.user_id, format_alert_message(alert, price, rising)) for alert, price, rising in fired)
+    )
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+from aiolimiter import AsyncLimiter
+from telegram import Bot
+from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError
+from telegram.request import HTTPXRequest
+
+from config import (
+    BROADCAST_CHAT_INTERVAL,
+    BROADCAST_MAX_ATTEMPTS,
+    BROADCAST_QUEUE_SIZE,
+    BROADCAST_RATE,
+    BROADCAST_REPORT_INTERVAL,
+    BROADCAST_WORKERS,
+)
+from metrics import MESSAGE_RETRIES, MESSAGES_FAILED, MESSAGES_SENT, RATE_LIMIT_WAIT
+
+ResultCallback = Callable[[int, Exception | None], None]
+
+
+def build_broadcast_bot(token: str, base_url: str | None = None) -> Bot:
+    """
+    Bot for BroadcastEngine sends, without the Application's AIORateLimiter: the engine already paces
+    globally and per chat and backs off on RetryAfter, so the limiter would only pace twice and retry
+    429s before the engine (and its retry metrics) ever saw them.
+    """
+    request = HTTPXRequest(connection_pool_size=BROADCAST_WORKERS)
+    if base_url:
+        return Bot(token, base_url=base_url, request=request)
+    return Bot(token, request=request)
+
+
+@dataclass(slots=True)
+class BroadcastStats:
+    queued: int = 0
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    max_queue_depth: int = 0
+    started: float = field(default_factory=time.monotonic)
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Delivered messages per second."""
+        elapsed = self.elapsed or (time.monotonic() - self.started)
+        return self.sent / elapsed if elapsed > 0 else 0.0
+
+
+class BroadcastEngine:
+    """
+    Bounded-concurrency sender for scheduled fan-outs.
+
+    Messages are fed through a bounded queue to a fixed pool of workers, so memory stays flat
+    no matter how many recipients a tick has. Sends are paced globally (token bucket) and per
+    chat; a RetryAfter pauses every worker for the requested time and the message is retried
+    instead of being dropped.
+    """
+
+    def __init__(self, workers: int = BROADCAST_WORKERS, rate: float = BROADCAST_RATE,
+                 queue_size: int = BROADCAST_QUEUE_SIZE, chat_interval: float = BROADCAST_CHAT_INTERVAL,
+                 max_attempts: int = BROADCAST_MAX_ATTEMPTS):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.chat_interval = chat_interval
+        self.max_attempts = max_attempts
+        self._limiter = AsyncLimiter(rate, 1)
+        self._resume_at = 0.0  # monotonic time until which all sends are paused (flood control)
+        self._chat_ready: dict[int, float] = {}  # chat_id -> earliest monotonic time of the next send
+
+    async def send_all(self, bot: Bot, messages: Iterable[tuple[int, str]], parse_mode: str | None = "Markdown",
+                       on_result: ResultCallback | None = None) -> BroadcastStats:
+        """
+        Deliver (chat_id, text) pairs and return the run's stats.
+        on_result(chat_id, error) is called once per message; error is None on success.
+        """
+        queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue(maxsize=self.queue_size)
+        stats = BroadcastStats()
+        workers = [
+            asyncio.create_task(self._worker(bot, queue, stats, parse_mode, on_result))
+            for _ in range(self.workers)
+        ]
+        reporter = asyncio.create_task(self._report(queue, stats))
+        try:
+            for chat_id, text in messages:
+                await queue.put((chat_id, text))  # blocks while the queue is full
+                stats.queued += 1
+                stats.max_queue_depth = max(stats.max_queue_depth, queue.qsize())
+            await queue.join()
+        finally:
+            for task in (*workers, reporter):
+                task.cancel()
+            await asyncio.gather(*workers, reporter, return_exceptions=True)
+            self._prune_chat_ready()
+
+        stats.elapsed = time.monotonic() - stats.started
+        if stats.queued:
+            logging.info(
+                "📤 Broadcast done: %s sent, %s failed, %s retries in %.1f s (%.1f msg/s, peak queue %s)",
+                stats.sent, stats.failed, stats.retried, stats.elapsed, stats.throughput, stats.max_queue_depth,
+            )
+        return stats
+
+    async def _worker(self, bot: Bot, queue: asyncio.Queue, stats: BroadcastStats,
+                      parse_mode: str | None, on_result: ResultCallback | None) -> None:
+        while True:
+            chat_id, text = await queue.get()
+            try:
+                error = await self._deliver(bot, chat_id, text, parse_mode, stats)
+                if error is None:
+                    stats.sent += 1
+                    MESSAGES_SENT.inc()
+                else:
+                    stats.failed += 1
+                    MESSAGES_FAILED.labels(type(error).__name__).inc()
+                    logging.error(f"❌ Failed to send message to user {chat_id} | {type(error).__name__}: {error}")
+                if on_result:
+                    on_result(chat_id, error)
+            except Exception as e:
+                logging.exception(f"Unexpected error while broadcasting to {chat_id}: {e}")
+            finally:
+                queue.task_done()
+
+    async def _deliver(self, bot: Bot, chat_id: int, text: str, parse_mode: str | None,
+                       stats: BroadcastStats) -> Exception | None:
+        """Send one message, retrying flood-control and transient network errors."""
+        error: Exception | None = None
+        for attempt in range(1, self.max_attempts + 1):
+            waiting_since = time.monotonic()
+            await self._wait_turn(chat_id)
+            backoff = 0.0
+            try:
+                async with self._limiter:
+                    RATE_LIMIT_WAIT.labels("broadcast").observe(time.monotonic() - waiting_since)
+                    await bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+                self._chat_ready[chat_id] = time.monotonic() + self.chat_interval
+                return None
+            except RetryAfter as e:
+                # Flood control is per bot: pause every worker, then retry this message
+                self._resume_at = max(self._resume_at, time.monotonic() + float(e.retry_after))
+                logging.warning("⏳ Flood control: pausing broadcast for %s s", e.retry_after)
+                error = e
+            except BadRequest as e:  # subclass of NetworkError, but retrying won't help
+                return e
+            except NetworkError as e:
+                backoff = min(2 ** attempt, 30)
+                error = e
+            except TelegramError as e:  # Forbidden (user blocked the bot), ChatMigrated, ...
+                return e
+            if attempt < self.max_attempts:
+                stats.retried += 1
+                MESSAGE_RETRIES.inc()
+                await asyncio.sleep(backoff)
+        return error
+
+    async def _wait_turn(self, chat_id: int) -> None:
+        while True:
+            wait = max(self._resume_at, self._chat_ready.get(chat_id, 0.0)) - time.monotonic()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def _report(self, queue: asyncio.Queue, stats: BroadcastStats) -> None:
+        while True:
+            await asyncio.sleep(BROADCAST_REPORT_INTERVAL)
+            logging.info(
+                "📤 Broadcast progress: %s/%s sent, %s failed, queue depth %s, %.1f msg/s",
+                stats.sent, stats.queued, stats.failed, queue.qsize(), stats.throughput,
+            )
+
+    def _prune_chat_ready(self) -> None:
+        now = time.monotonic()
+        self._chat_ready = {chat_id: ts for chat_id, ts in self._chat_ready.items() if ts > now}
+
+
+BROADCAST_ENGINE = BroadcastEngine()
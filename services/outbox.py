@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import time
+
+from telegram import Bot
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from clock import CLOCK
+from config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_CATCHUP_WINDOW,
+    OUTBOX_CLAIM_TIMEOUT,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETENTION,
+    OUTBOX_RETRY_DELAY,
+)
+from db.db import (
+    OUTBOX_DELIVERED,
+    OUTBOX_EXPIRED,
+    OUTBOX_FAILED,
+    OutboxRow,
+    claim_due_notifications,
+    finish_notifications,
+    prune_notifications,
+    retry_notifications,
+)
+from handlers.price import get_price_snapshot, stale_age
+from metrics import METRICS
+from services.broadcast import BROADCAST_ENGINE, BroadcastEngine
+from util import format_price_messages
+
+PRUNE_INTERVAL = 3600  # seconds between clean-ups of finished rows
+
+
+def _is_transient(error: Exception) -> bool:
+    """Worth another attempt later: flood control or network trouble, but not a rejected request."""
+    return isinstance(error, (RetryAfter, NetworkError)) and not isinstance(error, BadRequest)
+
+
+class OutboxDrainer:
+    """
+    Delivers the notifications the scheduler wrote to `notification_outbox`.
+
+    A row only leaves the pending state after the send result is known: delivered, failed
+    (permanent Telegram error or OUTBOX_MAX_ATTEMPTS used up, with exponential back-off in
+    between) or expired (older than OUTBOX_CATCHUP_WINDOW). Rows are claimed atomically with a
+    lease (OUTBOX_CLAIM_TIMEOUT), so several drainers never send the same row; a crash
+    mid-broadcast leaves the unsent rows pending and they go out once the lease expires –
+    at-least-once delivery. Several rows for one user in one round are coalesced into a single
+    message.
+    """
+
+    def __init__(self, batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = OUTBOX_POLL_INTERVAL,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS, retry_delay: float = OUTBOX_RETRY_DELAY,
+                 max_age_min: int = OUTBOX_CATCHUP_WINDOW, claim_timeout: float = OUTBOX_CLAIM_TIMEOUT,
+                 engine: BroadcastEngine = BROADCAST_ENGINE):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_age_min = max_age_min
+        self.claim_timeout = claim_timeout
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._last_prune = float("-inf")
+        self.delivered = 0
+        self.failed = 0
+        self.expired = 0
+        self.retried = 0
+
+    def start(self, bot: Bot) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(bot), name="outbox-drainer")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def wake(self) -> None:
+        """Start a drain round now instead of at the next poll."""
+        self._wake.set()
+
+    def stats(self) -> dict[str, int]:
+        return {"delivered": self.delivered, "failed": self.failed, "expired": self.expired, "retried": self.retried}
+
+    async def _run(self, bot: Bot) -> None:
+        while True:
+            try:
+                while await self.drain_once(bot) >= self.batch_size:
+                    pass  # full batch – there may be more due right now
+                if time.monotonic() - self._last_prune >= PRUNE_INTERVAL:
+                    await prune_notifications(int(CLOCK.time() - OUTBOX_RETENTION) // 60)
+                    self._last_prune = time.monotonic()
+            except Exception as e:
+                logging.exception(f"Outbox drain round failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def drain_once(self, bot: Bot) -> int:
+        """Send one batch of due rows; returns how many rows were claimed."""
+        now = CLOCK.time()
+        rows = await claim_due_notifications(int(now), self.batch_size, int(now + self.claim_timeout))
+        if not rows:
+            return 0
+
+        oldest_min = int(now) // 60 - self.max_age_min
+        expired = [row.id for row in rows if row.fire_min < oldest_min]
+        if expired:
+            await finish_notifications(expired, OUTBOX_EXPIRED, "expired before delivery")
+            self.expired += len(expired)
+            logging.warning("📭 %s outbox notifications expired undelivered", len(expired))
+
+        by_user: dict[int, list[OutboxRow]] = {}
+        for row in rows:
+            if row.fire_min >= oldest_min:
+                by_user.setdefault(row.user_id, []).append(row)
+        if not by_user:
+            return len(rows)
+
+        snapshot = await get_price_snapshot()
+        if not snapshot:
+            await self._retry([row for user_rows in by_user.values() for row in user_rows], now, "no price available")
+            return len(rows)
+
+        logging.info(f"📤 Sending BTC update to {len(by_user)} users.")
+        messages = await format_price_messages(snapshot.data, list(by_user), stale_age(snapshot))
+        recipients = (
+            (user_id, f"📢 *BTC Update* 📢\n\n{message}")
+            for message, members in messages.items()
+            for user_id in members
+        )
+        results: dict[int, Exception | None] = {}
+        await self.engine.send_all(bot, recipients, on_result=results.__setitem__)
+
+        delivered, failed, retry = [], [], []
+        for user_id, user_rows in by_user.items():
+            error = results.get(user_id, RuntimeError("no send result"))
+            if error is None:
+                delivered.extend(row.id for row in user_rows)
+            elif _is_transient(error) or user_id not in results:
+                retry.extend(user_rows)
+            else:
+                failed.extend(row.id for row in user_rows)
+        await asyncio.gather(
+            finish_notifications(delivered, OUTBOX_DELIVERED),
+            finish_notifications(failed, OUTBOX_FAILED, "permanent send error"),
+            self._retry(retry, now, "transient send error"),
+        )
+        self.delivered += len(delivered)
+        self.failed += len(failed)
+        return len(rows)
+
+    async def _retry(self, rows: list[OutboxRow], now: float, error: str) -> None:
+        """Back off rows that still have attempts left; the rest are marked failed."""
+        give_up = [row.id for row in rows if row.attempts + 1 >= self.max_attempts]
+        by_delay: dict[int, list[int]] = {}
+        for row in rows:
+            if row.attempts + 1 < self.max_attempts:
+                by_delay.setdefault(int(now + self.retry_delay * 2 ** row.attempts), []).append(row.id)
+        await asyncio.gather(
+            finish_notifications(give_up, OUTBOX_FAILED, error),
+            *(retry_notifications(ids, next_attempt_at, error) for next_attempt_at, ids in by_delay.items()),
+        )
+        self.failed += len(give_up)
+        self.retried += len(rows) - len(give_up)
+
+
+OUTBOX = OutboxDrainer()
+METRICS.callback("outbox_notifications_total", "Outbox rows finished or retried by the drainer, by outcome",
+                 OUTBOX.stats, ("outcome",), kind="counter")
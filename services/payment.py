@@ -1,8 +1,7 @@
-from time import time
-
 from telegram import Update
 from telegram.ext import CallbackContext, ContextTypes
 
+from clock import CLOCK
 from config import (
     EXPIRY_SECONDS,
     INTERNATIONAL_TEST_TOKEN,
@@ -16,6 +15,7 @@ from db.db import (
     record_invoice,
     record_payment,
     remove_invoice_from_db,
+    remove_invoices_from_db,
 )
 from handlers.donate import handle_successful_donate_payment, send_invoice_donate
 from handlers.upgrade import handle_successful_upgrade_payment, send_invoice_upgrade
@@ -41,7 +41,7 @@ async def send_invoice(update: Update, context: CallbackContext, tier_type: Tier
         msg_id = await send_invoice_donate(update, context, tier_type, provider, currency, provider_token)
     context.chat_data["invoice_msg_id"] = msg_id
 
-    await record_invoice(message_id=msg_id, chat_id=update.effective_chat.id, created_at=int(time()))
+    await record_invoice(message_id=msg_id, chat_id=update.effective_chat.id, created_at=int(CLOCK.time()))
     context.job_queue.run_once(
         delete_invoice_msg_record,
         when=EXPIRY_SECONDS,
@@ -57,10 +57,10 @@ async def delete_invoice_msg_record(context: CallbackContext) -> None:
 
 
 async def cleanup_expired_invoices(context: CallbackContext) -> None:
-    expired = await get_expired_invoice_messages(int(time()) - EXPIRY_SECONDS)
+    expired = await get_expired_invoice_messages(int(CLOCK.time()) - EXPIRY_SECONDS)
     for message_id, chat_id in expired:
         await safe_delete_message(context.bot, chat_id, message_id)
-        await remove_invoice_from_db(message_id)
+    await remove_invoices_from_db([message_id for message_id, _ in expired])
 
 
 async def handle_precheckout_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -84,7 +84,7 @@ async def handle_precheckout_query(update: Update, context: ContextTypes.DEFAULT
 
     ts = parsed["ts"]
     # Expired invoice
-    if time() - ts > EXPIRY_SECONDS:
+    if CLOCK.time() - ts > EXPIRY_SECONDS:
         await query.answer(ok=False, error_message="This payment link has expired.")
         return
 
@@ -0,0 +1,193 @@
+import logging
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Iterable
+
+from telegram.ext import CallbackContext
+
+from clock import CLOCK
+from config import PRICE_HISTORY_SIZE
+from db.price_store import compact, flush_ticks, load_recent_ticks
+
+
+@dataclass(frozen=True, slots=True)
+class WindowStats:
+    points: int
+    low: float
+    high: float
+    change_pct: float  # first → last point of the window
+    volatility_pct: float  # standard deviation of tick-to-tick log returns, in percent
+
+
+class PriceRing:
+    """
+    Fixed-capacity ring buffer of (timestamp, price) for one currency.
+
+    All columns are flat `array('d')` buffers allocated once, so memory stays constant however
+    long the process runs. Appends are O(1); window queries binary-search the (monotonic)
+    timestamps and work on at most two contiguous array slices. Each point also stores running
+    totals of the log returns up to it (count, sum, sum of squares), so a window's volatility is
+    the difference of two points' totals instead of a loop over the window.
+    """
+
+    def __init__(self, capacity: int = PRICE_HISTORY_SIZE):
+        self.capacity = capacity
+        self._ts = array("d", bytes(8 * capacity))
+        self._px = array("d", bytes(8 * capacity))
+        self._n = array("d", bytes(8 * capacity))  # running totals of the log returns: count,
+        self._s1 = array("d", bytes(8 * capacity))  # sum
+        self._s2 = array("d", bytes(8 * capacity))  # and sum of squares
+        self._head = 0  # physical index of the oldest point
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def append(self, ts: float, price: float) -> None:
+        n = s1 = s2 = 0.0
+        if self._len:
+            prev = self._physical(self._len - 1)
+            if ts < self._ts[prev]:
+                return  # out-of-order tick – keep timestamps monotonic
+            n, s1, s2 = self._n[prev], self._s1[prev], self._s2[prev]
+            if price > 0 and self._px[prev] > 0:
+                r = math.log(price / self._px[prev])
+                n, s1, s2 = n + 1, s1 + r, s2 + r * r
+        if self._len < self.capacity:
+            pos = self._physical(self._len)
+            self._len += 1
+        else:
+            pos = self._head
+            self._head = (self._head + 1) % self.capacity
+        self._ts[pos] = ts
+        self._px[pos] = price
+        self._n[pos], self._s1[pos], self._s2[pos] = n, s1, s2
+
+    def last(self) -> tuple[float, float] | None:
+        if not self._len:
+            return None
+        pos = self._physical(self._len - 1)
+        return self._ts[pos], self._px[pos]
+
+    def price_at(self, ts: float) -> tuple[float, float] | None:
+        """Latest point at or before ts."""
+        i = self._bisect_right(ts) - 1
+        if i < 0:
+            return None
+        pos = self._physical(i)
+        return self._ts[pos], self._px[pos]
+
+    def window(self, start_ts: float) -> array:
+        """Prices with timestamp >= start_ts, oldest first."""
+        return self._slice(self._bisect_left(start_ts), self._len)
+
+    def stats(self, start_ts: float) -> WindowStats | None:
+        lo = self._bisect_left(start_ts)
+        if lo >= self._len:
+            return None
+        a, b = self._physical(lo), self._physical(self._len - 1)
+        n = self._n[b] - self._n[a]  # returns inside the window: those after its first point
+        volatility = 0.0
+        if n > 1:
+            s1 = self._s1[b] - self._s1[a]
+            variance = max(self._s2[b] - self._s2[a] - s1 * s1 / n, 0.0) / (n - 1)
+            volatility = math.sqrt(variance) * 100
+        prices = self._slice(lo, self._len)
+        first, last = self._px[a], self._px[b]
+        return WindowStats(
+            points=len(prices),
+            low=min(prices),
+            high=max(prices),
+            change_pct=(last - first) / first * 100 if first else 0.0,
+            volatility_pct=volatility,
+        )
+
+    def _physical(self, i: int) -> int:
+        return (self._head + i) % self.capacity
+
+    def _slice(self, lo: int, hi: int) -> array:
+        if lo >= hi:
+            return array("d")
+        a, b = self._physical(lo), self._physical(hi - 1) + 1
+        if a < b:
+            return self._px[a:b]
+        return self._px[a:] + self._px[:b]  # window wraps around the end of the buffer
+
+    def _bisect_left(self, ts: float) -> int:
+        lo, hi = 0, self._len
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts[self._physical(mid)] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _bisect_right(self, ts: float) -> int:
+        lo, hi = 0, self._len
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts[self._physical(mid)] <= ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+class PriceHistory:
+    """Per-currency price rings, filled on every fetched tick."""
+
+    def __init__(self, capacity: int = PRICE_HISTORY_SIZE):
+        self.capacity = capacity
+        self._rings: dict[str, PriceRing] = {}
+
+    def record(self, ts: float, prices: dict[str, float]) -> None:
+        for currency, price in prices.items():
+            ring = self._rings.get(currency)
+            if ring is None:
+                ring = self._rings[currency] = PriceRing(self.capacity)
+            ring.append(ts, float(price))
+
+    def load(self, points: Iterable[tuple[float, str, float]]) -> None:
+        """Bulk-fill from (ts, currency, price) rows ordered by ts."""
+        for ts, currency, price in points:
+            self.record(ts, {currency: price})
+
+    def ring(self, currency: str) -> PriceRing | None:
+        return self._rings.get(currency.lower())
+
+    def change_pct(self, currency: str, price: float, window: float, now: float) -> float | None:
+        """
+        Percent change from the price `window` seconds ago to `price`; None if the history does not
+        reach back that far (or has a gap longer than a tenth of the window around that point).
+        """
+        ring = self.ring(currency)
+        point = ring.price_at(now - window) if ring else None
+        if point is None or (now - window) - point[0] > window / 10 or not point[1]:
+            return None
+        return (price - point[1]) / point[1] * 100
+
+    def stats(self, currency: str, window: float, now: float) -> WindowStats | None:
+        ring = self.ring(currency)
+        return ring.stats(now - window) if ring else None
+
+
+PRICE_HISTORY = PriceHistory()
+
+
+async def warm_start_price_history() -> None:
+    """Refill the in-memory history from the last 24 h of persisted ticks."""
+    rows = await load_recent_ticks(CLOCK.time() - 86400)
+    PRICE_HISTORY.load(rows)
+    logging.info("Warm-started price history with %s persisted ticks.", len(rows))
+
+
+async def persist_price_ticks(context: CallbackContext) -> None:
+    written = await flush_ticks()
+    logging.debug("Persisted %s price ticks.", written)
+
+
+async def compact_price_store(context: CallbackContext) -> None:
+    await flush_ticks()
+    await compact()
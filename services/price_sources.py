@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+import aiohttp
+
+from config import (
+    BLOCKCHAIN_API,
+    COINGECKO_API,
+    CURRENCIES,
+    PRICE_HEDGE_DELAY,
+    PRICE_MAX_DEVIATION,
+    PRICE_QUORUM,
+    PRICE_SOURCE_MODE,
+    PRICE_SOURCE_STATS_WINDOW,
+)
+from metrics import SOURCE_FETCH_RESULTS, SOURCE_FETCH_SECONDS
+from util import fetch_json
+
+
+@dataclass(frozen=True)
+class PriceSource:
+    name: str
+    url: str
+    parse: Callable[[dict], dict | None]  # raw JSON → {"usd": price, ...}
+
+
+@dataclass(slots=True)
+class SourceStats:
+    latencies: deque = field(default_factory=lambda: deque(maxlen=PRICE_SOURCE_STATS_WINDOW))
+    successes: int = 0
+    errors: int = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.latencies.append(latency)
+        if ok:
+            self.successes += 1
+        else:
+            self.errors += 1
+
+    def percentile(self, q: float) -> float | None:
+        """Rolling latency percentile (0 < q < 1) over the last PRICE_SOURCE_STATS_WINDOW fetches."""
+        if len(self.latencies) < 5:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    @property
+    def error_rate(self) -> float:
+        total = self.successes + self.errors
+        return self.errors / total if total else 0.0
+
+
+def parse_coingecko(data: dict) -> dict | None:
+    if data and "bitcoin" in data:
+        return data["bitcoin"]
+    return None
+
+
+def parse_blockchain(data: dict) -> dict | None:
+    if data:
+        return {
+            currency.lower(): round(info["last"])
+            for currency, info in data.items()
+            if currency in CURRENCIES
+        }
+    return None
+
+
+# Registry order is the preference order: the first source is asked first in "first" mode
+PRICE_SOURCES: dict[str, PriceSource] = {}
+SOURCE_STATS: dict[str, SourceStats] = {}
+
+
+def register_source(source: PriceSource) -> None:
+    PRICE_SOURCES[source.name] = source
+    SOURCE_STATS.setdefault(source.name, SourceStats())
+
+
+def unregister_source(name: str) -> None:
+    PRICE_SOURCES.pop(name, None)
+
+
+register_source(PriceSource("coingecko", COINGECKO_API, parse_coingecko))
+register_source(PriceSource("blockchain", BLOCKCHAIN_API, parse_blockchain))
+
+
+def source_stats() -> dict[str, dict[str, float | int | None]]:
+    return {
+        name: {
+            "p50": stats.percentile(0.5),
+            "p90": stats.percentile(0.9),
+            "successes": stats.successes,
+            "errors": stats.errors,
+            "error_rate": stats.error_rate,
+        }
+        for name, stats in SOURCE_STATS.items()
+        if name in PRICE_SOURCES
+    }
+
+
+async def fetch_source(session: aiohttp.ClientSession, source: PriceSource) -> dict | None:
+    """Fetch and parse one source, recording its latency and outcome."""
+    started = time.monotonic()
+    prices = None
+    try:
+        prices = source.parse(await fetch_json(session, source.url))
+    except (KeyError, TypeError, ValueError) as e:
+        logging.error(f"Unexpected response format from {source.name}: {e}")
+    elapsed = time.monotonic() - started
+    SOURCE_STATS[source.name].record(elapsed, bool(prices))
+    SOURCE_FETCH_SECONDS.labels(source.name).observe(elapsed)
+    SOURCE_FETCH_RESULTS.labels(source.name, "ok" if prices else "error").inc()
+    return prices or None
+
+
+async def fetch_prices(session: aiohttp.ClientSession) -> dict | None:
+    """Fetch BTC prices using the configured PRICE_SOURCE_MODE."""
+    if PRICE_SOURCE_MODE == "quorum":
+        return await fetch_quorum(session)
+    return await fetch_first(session)
+
+
+def _hedge_delay(source: PriceSource) -> float:
+    """How long to give a source before hedging with the next one: its rolling p90 latency."""
+    p90 = SOURCE_STATS[source.name].percentile(0.9)
+    return PRICE_HEDGE_DELAY if p90 is None else min(max(p90, 0.05), 5.0)
+
+
+async def fetch_first(session: aiohttp.ClientSession) -> dict | None:
+    """
+    Hedged "first good response wins": sources are started in registry order, the next one only
+    when the previous ones have not answered within their p90 latency (or have failed).
+    The first usable quote wins and the remaining requests are cancelled.
+    """
+    sources = list(PRICE_SOURCES.values())
+    pending: set[asyncio.Task] = set()
+    try:
+        for i, source in enumerate(sources):
+            pending.add(asyncio.create_task(fetch_source(session, source)))
+            is_last = i == len(sources) - 1
+            deadline = None if is_last else time.monotonic() + _hedge_delay(source)
+            while pending:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result():
+                        return task.result()
+                if not done:
+                    break  # hedge delay elapsed – start the next source
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def fetch_quorum(session: aiohttp.ClientSession) -> dict | None:
+    """
+    Ask every source and keep, per currency, the median of the quotes that agree with it.
+    A currency is only published if at least PRICE_QUORUM sources agree within PRICE_MAX_DEVIATION,
+    so a single bad quote can never reach the cache.
+    """
+    sources = list(PRICE_SOURCES.values())
+    results = await asyncio.gather(*(fetch_source(session, source) for source in sources))
+    quotes = [result for result in results if result]
+    if len(quotes) < PRICE_QUORUM:
+        return None
+
+    aggregated = {}
+    for currency in {currency for quote in quotes for currency in quote}:
+        values = [quote[currency] for quote in quotes if currency in quote]
+        if len(values) < PRICE_QUORUM:
+            continue
+        mid = statistics.median(values)
+        agreeing = [value for value in values if abs(value - mid) <= mid * PRICE_MAX_DEVIATION]
+        if len(agreeing) < PRICE_QUORUM:
+            logging.warning("No price quorum for %s: %s", currency.upper(), values)
+            continue
+        aggregated[currency] = round(statistics.median(agreeing))
+    return aggregated or None
@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from aiolimiter import AsyncLimiter
+
+from handler_timing import account
+from metrics import RATE_LIMIT_WAIT
+
+
+class _UserLimits:
+    __slots__ = ("limiters", "last_used", "in_use")
+
+    def __init__(self, rates: tuple[tuple[float, float], ...]):
+        self.limiters = tuple(AsyncLimiter(max_rate, period) for max_rate, period in rates)
+        self.last_used = 0.0
+        self.in_use = 0
+
+
+class UserRateLimiter:
+    """
+    Per-user leaky-bucket limits that only keep recently active users.
+
+    A bucket that has been idle for its longest time period has fully drained, i.e. it is
+    indistinguishable from a fresh one – so entries idle for that long are dropped, and
+    a returning user gets exactly the limits they would have had. Entries sit in an
+    OrderedDict by last use, so eviction only looks at the stale head. Entries with a
+    request in flight are never evicted.
+    """
+
+    def __init__(self, *rates: tuple[float, float]):
+        self.rates = rates
+        self.ttl = max(period for _, period in rates)
+        self._users: OrderedDict[int, _UserLimits] = OrderedDict()
+        self.created = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    @asynccontextmanager
+    async def limit(self, user_id: int) -> AsyncIterator[None]:
+        """`async with USER_LIMITER.limit(uid):` – waits until every per-user limit has capacity."""
+        now = time.monotonic()
+        self._evict(now)
+        entry = self._users.get(user_id)
+        if entry is None:
+            entry = self._users[user_id] = _UserLimits(self.rates)
+            self.created += 1
+        else:
+            self._users.move_to_end(user_id)
+        entry.in_use += 1
+        try:
+            for limiter in entry.limiters:
+                await limiter.acquire()
+            waited = time.monotonic() - now
+            RATE_LIMIT_WAIT.labels("user").observe(waited)
+            account("wait", waited, "user rate limit")
+            yield
+        finally:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+            if user_id in self._users:
+                self._users.move_to_end(user_id)
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._users), "created": self.created, "evicted": self.evicted}
+
+    def _evict(self, now: float) -> None:
+        users = self._users
+        while users:
+            user_id, entry = next(iter(users.items()))
+            if entry.in_use or now - entry.last_used < self.ttl:
+                break  # head is the least recently used entry – nothing older to drop
+            del users[user_id]
+            self.evicted += 1
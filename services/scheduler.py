@@ -1,70 +1,79 @@
-import asyncio
 import logging
-from datetime import datetime, timezone
+import time
 
 from telegram.ext import ContextTypes
 
-from config import PREDEFINED_INTERVALS
-from db.db import get_all_personal, get_base_subscribers
-from handlers.price import format_price_message, get_btc_price
+from clock import CLOCK
+from config import OUTBOX_CATCHUP_WINDOW, PREDEFINED_INTERVALS
+from db.db import (
+    enqueue_notifications,
+    get_base_subscribers,
+    get_due_personal_subscribers,
+    get_scheduler_state,
+    set_scheduler_state,
+)
+from db.plan_index import PLAN_INDEX, epoch_minute
+from metrics import TICK_LATENESS, TICK_RECIPIENTS, TICK_SECONDS
+from services.outbox import OUTBOX
 
+LAST_TICK_KEY = "last_tick_min"
 
-async def notify_subscribers(context: ContextTypes.DEFAULT_TYPE):
-    """Background task that checks base plan subscribers and sends updates."""
-
-    app = context.application
-    now = datetime.now(timezone.utc)
-    users_to_notify = set()
 
-    # base plans
-    for interval in PREDEFINED_INTERVALS:
-        if is_time_to_send_base(interval):
-            users = await get_base_subscribers(interval)
-            users_to_notify.update(users)  # set() automatically removes duplicates
+async def notify_subscribers(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Scheduler tick: writes this minute's due notifications to the outbox and wakes the drainer.
 
-    # personal plans
-    rows = await get_all_personal()  # [(uid, interval, iso), …]
-    for uid, interval, first_iso in rows:
-        first_fire = datetime.fromisoformat(first_iso)
-        first_fire = first_fire.replace(tzinfo=timezone.utc)
-        if is_time_to_send_personal(first_fire, interval, now):
-            users_to_notify.add(uid)
+    The last handled minute is persisted, so minutes missed while the bot was down (or a tick
+    that did not fire) are replayed up to OUTBOX_CATCHUP_WINDOW back. A user due in several
+    missed minutes gets one notification, for the latest of them.
+    """
+    started = time.perf_counter()
+    now = CLOCK.now()
+    now_min = epoch_minute(now)
+    TICK_LATENESS.observe(now.timestamp() - now_min * 60)
+    last_tick = await get_scheduler_state(LAST_TICK_KEY)
+    first_min = now_min if last_tick is None else max(last_tick + 1, now_min - OUTBOX_CATCHUP_WINDOW)
+    if first_min > now_min:
+        return  # this minute was already handled
 
-    if not users_to_notify:
-        return
+    due: dict[int, int] = {}  # user_id -> schedule minute
+    for minute in range(first_min, now_min):
+        for user_id in await get_due_users(minute, catch_up=True):
+            due[user_id] = minute
+    for user_id in await get_due_users(now_min):
+        due[user_id] = now_min
 
-    logging.info(f"📤 Sending BTC update to {len(users_to_notify)} users.")
+    if due:
+        await enqueue_notifications(due.items())
+        OUTBOX.wake()
+    await set_scheduler_state(LAST_TICK_KEY, now_min)
+    TICK_RECIPIENTS.observe(len(due))
+    TICK_SECONDS.observe(time.perf_counter() - started)
+    if first_min < now_min:
+        logging.info("⏪ Scheduler caught up %s missed minutes (%s notifications)", now_min - first_min, len(due))
 
-    price_data = await get_btc_price()
-    if not price_data:
-        return
 
-    tasks, user_ids = [], []
-    for user_id in users_to_notify:
-        message = await format_price_message(price_data, user_id)
-        user_ids.append(user_id)
-        tasks.append(
-            app.bot.send_message(
-                chat_id=user_id, text=f"📢 *BTC Update* 📢\n\n{message}", parse_mode="Markdown"
-            )
-        )
-    # Run all send tasks in parallel, safely
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    for uid, result in zip(user_ids, results):
-        if isinstance(result, Exception):
-            logging.error(
-                f"❌ Failed to send message to user {uid} | {type(result).__name__}: {result}"
-            )
+async def get_due_users(minute: int, catch_up: bool = False) -> set[int]:
+    """
+    Users with a base or personal plan due at `minute` (epoch minutes). The current minute uses
+    the in-memory plan index; missed minutes are looked up in SQL, since the index has moved on.
+    """
+    users = set()
+    for interval in PREDEFINED_INTERVALS:
+        if is_time_to_send_base(interval, minute):
+            users.update(await get_base_subscribers(interval))
+    if catch_up:
+        users.update(await get_due_personal_subscribers(minute))
+    else:
+        users.update(PLAN_INDEX.pop_due(minute))
+    return users
 
 
-def is_time_to_send_base(interval_minutes: int) -> bool:
-    now = datetime.now(timezone.utc)
-    total_minutes = now.hour * 60 + now.minute  # 0-1439 UTC
-    return (total_minutes % interval_minutes) == 0
+def is_time_to_send_base(interval_minutes: int, minute: int) -> bool:
+    """Base intervals all divide a day, so epoch minutes line up with UTC midnight."""
+    return minute % interval_minutes == 0
 
 
-def is_time_to_send_personal(first_fire: datetime, interval: int, now: datetime) -> bool:
-    if now < first_fire:
-        return False
-    elapsed_min = int((now - first_fire).total_seconds() // 60)
-    return elapsed_min % interval == 0
+def is_time_to_send_personal(first_fire_min: int, interval: int, now_min: int) -> bool:
+    """All arguments in epoch minutes / minutes – no datetime parsing on the hot path."""
+    return now_min >= first_fire_min and (now_min - first_fire_min) % interval == 0
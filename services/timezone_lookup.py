@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from telegram.ext import CallbackContext
+
+from config import TZ_GRID_DEGREES, TZ_LOOKUP_CACHE_SIZE
+
+if TYPE_CHECKING:
+    from timezonefinder import TimezoneFinder
+
+_FINDER: "TimezoneFinder | None" = None
+_FINDER_LOCK = threading.Lock()
+# One worker: the finder reads its polygon file with seek/read, so lookups must not overlap
+_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tz-lookup")
+
+
+def get_finder() -> "TimezoneFinder":
+    """Process-wide TimezoneFinder, imported and loaded on first use (together ~0.6 s, pulls in numpy)."""
+    global _FINDER
+    with _FINDER_LOCK:
+        if _FINDER is None:
+            started = time.perf_counter()
+            from timezonefinder import TimezoneFinder
+
+            _FINDER = TimezoneFinder()
+            logging.info("🌍 TimezoneFinder loaded in %.2f s", time.perf_counter() - started)
+        return _FINDER
+
+
+@lru_cache(maxsize=TZ_LOOKUP_CACHE_SIZE)
+def _zone_for_cell(lat_cell: int, lng_cell: int) -> str | None:
+    return get_finder().timezone_at(lat=lat_cell * TZ_GRID_DEGREES, lng=lng_cell * TZ_GRID_DEGREES)
+
+
+def zone_at(lat: float, lng: float) -> str | None:
+    """Blocking lookup via the coordinate grid cache; call from a worker thread."""
+    return _zone_for_cell(round(lat / TZ_GRID_DEGREES), round(lng / TZ_GRID_DEGREES))
+
+
+async def timezone_at(lat: float, lng: float) -> str | None:
+    """IANA timezone name for a coordinate, without blocking the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(_EXECUTOR, zone_at, lat, lng)
+
+
+async def warm_timezone_finder(context: CallbackContext) -> None:
+    """Load the finder in the background so the first shared location doesn't pay for it."""
+    try:
+        await asyncio.get_running_loop().run_in_executor(_EXECUTOR, get_finder)
+    except Exception as e:
+        logging.error("Failed to warm up TimezoneFinder: %s", e)
+
+
+def lookup_cache_info():
+    return _zone_for_cell.cache_info()
@@ -0,0 +1,89 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable
+from zoneinfo import ZoneInfo
+
+DAY = 86400
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> ZoneInfo:
+    """Cached ZoneInfo – one object per zone name for the whole process."""
+    return ZoneInfo(name)
+
+
+def _offset_seconds(zone: ZoneInfo, ts: float) -> int:
+    return int(datetime.fromtimestamp(ts, zone).utcoffset().total_seconds())
+
+
+class UtcOffsetTable:
+    """
+    UTC offset per timezone, precomputed for the window in which it is constant.
+
+    For each zone the table stores (offset, valid_from, valid_until). valid_until is the
+    zone's next DST transition (found by a day-step scan plus binary search to the second)
+    or `horizon` seconds ahead when there is none, so a lookup is a dict get plus two
+    comparisons and the zone rules are only consulted again at a transition.
+    """
+
+    def __init__(self, horizon: int = 7 * DAY):
+        self.horizon = horizon
+        self._windows: dict[str, tuple[int, float, float]] = {}
+        self.refreshes = 0
+
+    def offset_minutes(self, zone_name: str, ts: float) -> int:
+        window = self._windows.get(zone_name)
+        if window is None or not window[1] <= ts < window[2]:
+            window = self._windows[zone_name] = self._compute(zone_name, ts)
+            self.refreshes += 1
+        return window[0]
+
+    def effective_offset(self, tz_data: dict | None, ts: float) -> int | None:
+        """
+        Offset (minutes) to show a user at ts: the zone's current offset for location-based settings,
+        the stored fixed offset for manual ones, None when the user has no time settings (UTC stamp).
+        """
+        if not (tz_data and (tz_data.get("timezone") or tz_data.get("method"))):
+            return None
+        if tz_data["method"] == "location" and tz_data["timezone"]:
+            return self.offset_minutes(tz_data["timezone"], ts)
+        return tz_data["offset_minutes"]
+
+    def batch_offsets(self, tz_settings: Iterable[dict | None], ts: float) -> list[int | None]:
+        """Vectorised effective_offset for one instant – e.g. 'now' for every broadcast recipient."""
+        resolved: dict[tuple, int | None] = {}
+        offsets = []
+        for tz_data in tz_settings:
+            key = (tz_data["timezone"], tz_data["offset_minutes"], tz_data["method"]) if tz_data else None
+            if key not in resolved:
+                resolved[key] = self.effective_offset(tz_data, ts)
+            offsets.append(resolved[key])
+        return offsets
+
+    def _compute(self, zone_name: str, ts: float) -> tuple[int, float, float]:
+        zone = get_zone(zone_name)
+        offset = _offset_seconds(zone, ts)
+        until = ts + self.horizon
+        probe = ts
+        while probe < until:
+            step_end = min(probe + DAY, until)
+            if _offset_seconds(zone, step_end) != offset:
+                until = self._transition(zone, offset, probe, step_end)
+                break
+            probe = step_end
+        return offset // 60, ts, until
+
+    @staticmethod
+    def _transition(zone: ZoneInfo, offset: int, lo: float, hi: float) -> float:
+        """First second in (lo, hi] with a different offset; the offset at lo is `offset`."""
+        lo, hi = int(lo), int(hi)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if _offset_seconds(zone, mid) == offset:
+                lo = mid
+            else:
+                hi = mid
+        return hi
+
+
+UTC_OFFSETS = UtcOffsetTable()
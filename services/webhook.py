@@ -0,0 +1,99 @@
+import asyncio
+import hmac
+import logging
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """
+    Receives Telegram updates over HTTPS POST (aiohttp) instead of long polling.
+
+    The request handler only checks the secret token and queues the raw JSON – Telegram gets
+    its 200 right away. A single decoder task turns queued payloads into `Update` objects and
+    feeds them to `app.update_queue`, so every registered handler works exactly as with polling.
+    A full queue answers 503; Telegram then retries the delivery later.
+    """
+
+    def __init__(self, app: Application, path: str, secret: str, queue_size: int):
+        if not secret:  # without it anyone who can reach the port could post forged updates (e.g. payments)
+            raise ValueError("WebhookServer needs a secret token")
+        self.app = app
+        self.path = path
+        self.secret = secret
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=queue_size)
+        self._runner: web.AppRunner | None = None
+        self._decoder: asyncio.Task | None = None
+        self.received = 0
+        self.rejected = 0
+
+        self.web_app = web.Application()
+        self.web_app.router.add_post(path, self._handle_update)
+        self.web_app.router.add_get("/healthz", self._handle_health)
+
+    async def start(self, host: str, port: int, public_url: str | None) -> None:
+        self._decoder = asyncio.create_task(self._decode_loop(), name="webhook-decoder")
+        self._runner = web.AppRunner(self.web_app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logging.info("🌐 Webhook server listening on %s:%s%s", host, port, self.path)
+
+        if public_url:  # without it, the webhook is registered elsewhere (e.g. once for all replicas)
+            await self.app.bot.set_webhook(
+                url=public_url.rstrip("/") + self.path,
+                secret_token=self.secret,
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=True,
+            )
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()  # stop accepting first, then drain what was accepted
+            self._runner = None
+        if self._decoder is not None:
+            await self._queue.join()
+            self._decoder.cancel()
+            await asyncio.gather(self._decoder, return_exceptions=True)
+            self._decoder = None
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), self.secret):
+            self.rejected += 1
+            return web.Response(status=403)
+        try:
+            payload = await request.json()
+        except ValueError:
+            self.rejected += 1
+            return web.Response(status=400)
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            logging.warning("Webhook queue full (%s) – asking Telegram to retry", self._queue.maxsize)
+            return web.Response(status=503)
+        self.received += 1
+        return web.Response()
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "status": "ok",
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "received": self.received,
+            "rejected": self.rejected,
+        })
+
+    async def _decode_loop(self) -> None:
+        while True:
+            payload = await self._queue.get()
+            try:
+                update = Update.de_json(payload, self.app.bot)
+                if update is not None:
+                    await self.app.update_queue.put(update)
+            except Exception as e:
+                logging.error("Dropping undecodable webhook update: %s", e)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,137 @@
+"""
+Startup timing report.
+
+Set STARTUP_PROFILE=1 to log, or STARTUP_PROFILE=<file>.json to also write, the time spent in every
+import (cumulative and self) and in every init step wrapped in PROFILER.step(). Must be imported before
+anything it should time – btc_price_bot imports it first.
+"""
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+from typing import Iterator
+
+from dotenv import load_dotenv
+
+
+class _TimingLoader:
+    """Wraps a module loader to time exec_module; everything else is delegated."""
+
+    def __init__(self, loader, profiler: "StartupProfiler", name: str):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        try:
+            with self._profiler.timed_import(self._name):
+                self._loader.exec_module(module)
+        finally:
+            # Hand the real loader back, so later introspection sees the usual loader type
+            if module.__spec__ is not None:
+                module.__spec__.loader = self._loader
+            module.__loader__ = self._loader
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+
+class _TimingFinder(MetaPathFinder):
+    def __init__(self, profiler: "StartupProfiler"):
+        self._profiler = profiler
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimingLoader(spec.loader, self._profiler, name)
+        return spec
+
+
+class StartupProfiler:
+    def __init__(self, target: str | None):
+        self.target = target  # None = disabled, "1" = log only, else JSON output path
+        self.enabled = bool(target)
+        self.started = time.perf_counter()
+        self.imports: dict[str, list[float]] = {}  # module -> [cumulative, self]
+        self.steps: list[tuple[str, float]] = []
+        self._import_stack: list[float] = []  # children time per open import
+        self._finder: _TimingFinder | None = None
+
+    def install(self) -> None:
+        if self.enabled and self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self) -> None:
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    @contextmanager
+    def timed_import(self, name: str) -> Iterator[None]:
+        self._import_stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._import_stack.pop()
+            self.imports[name] = [elapsed, elapsed - children]
+            if self._import_stack:
+                self._import_stack[-1] += elapsed
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """Time one init step; a no-op apart from two clock reads when profiling is off."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.steps.append((name, time.perf_counter() - start))
+
+    def report(self, top: int = 25) -> dict:
+        by_self = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        return {
+            "total_s": round(time.perf_counter() - self.started, 4),
+            "imports_total_s": round(sum(t[1] for t in self.imports.values()), 4),
+            "modules_imported": len(self.imports),
+            "steps": [{"name": name, "s": round(elapsed, 4)} for name, elapsed in self.steps],
+            "slowest_imports": [
+                {"module": name, "self_s": round(self_s, 4), "cumulative_s": round(cumulative, 4)}
+                for name, (cumulative, self_s) in by_self
+            ],
+        }
+
+    def finish(self) -> dict | None:
+        """Stop timing imports and emit the report (log, plus JSON file if a path was given)."""
+        if not self.enabled:
+            return None
+        self.uninstall()
+        report = self.report()
+        logging.info("⏱️ Startup took %.2f s (imports %.2f s)", report["total_s"], report["imports_total_s"])
+        for step in report["steps"]:
+            logging.info("⏱️   %-28s %.3f s", step["name"], step["s"])
+        if self.target != "1":
+            with open(self.target, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            logging.info("⏱️ Startup profile written to %s", self.target)
+        return report
+
+
+load_dotenv()  # config.py loads .env too, but only after the profiler has to be set up
+PROFILER = StartupProfiler(os.getenv("STARTUP_PROFILE"))
+PROFILER.install()
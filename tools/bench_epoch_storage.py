@@ -0,0 +1,71 @@
+"""
+Per-row cost of the personal-plan "is it due?" check: ISO text timestamps (schema v2)
+versus integer epoch minutes (schema v3), in Python and in SQL.
+
+    python -m tools.bench_epoch_storage [rows]
+"""
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from db.db import DUE_PERSONAL
+from db.plan_index import epoch_minute
+from services.scheduler import is_time_to_send_personal
+
+
+def is_time_to_send_personal_iso(first_fire_iso: str, interval: int, now: datetime) -> bool:
+    """The v2 check: parse the stored text on every tick."""
+    first_fire = datetime.fromisoformat(first_fire_iso).replace(tzinfo=timezone.utc)
+    if now < first_fire:
+        return False
+    elapsed_min = int((now - first_fire).total_seconds() // 60)
+    return elapsed_min % interval == 0
+
+
+def bench(label: str, rows: int, fn, repeat: int = 5) -> float:
+    best = min(_timed(fn) for _ in range(repeat))
+    print(f"{label:<34} {best * 1e3:8.2f} ms total  {best / rows * 1e9:8.1f} ns/row")
+    return best
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(rows: int) -> None:
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    now_min = epoch_minute(now)
+    plans = []
+    for _ in range(rows):
+        first = now - timedelta(minutes=random.randint(-1440, 60 * 24 * 90))
+        plans.append((random.randint(1, 10**9), random.choice((1, 5, 7, 15, 60, 240, 1440)), first))
+    iso_rows = [(user_id, interval, first.strftime("%Y-%m-%d %H:%M:%S")) for user_id, interval, first in plans]
+    int_rows = [(user_id, interval, epoch_minute(first)) for user_id, interval, first in plans]
+
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE iso_plans (user_id INTEGER, interval_minutes INTEGER, first_fire_time TIMESTAMP)")
+    db.execute("CREATE TABLE personal_subscribers (user_id INTEGER, interval_minutes INTEGER, first_fire_min INTEGER)")
+    db.executemany("INSERT INTO iso_plans VALUES (?, ?, ?)", iso_rows)
+    db.executemany("INSERT INTO personal_subscribers VALUES (?, ?, ?)", int_rows)
+
+    print(f"{rows} personal plans\n")
+    iso = bench("python, ISO text (v2)", rows, lambda: [
+        u for u, i, f in db.execute("SELECT * FROM iso_plans") if is_time_to_send_personal_iso(f, i, now)
+    ])
+    ints = bench("python, epoch minutes (v3)", rows, lambda: [
+        u for u, i, f in db.execute("SELECT * FROM personal_subscribers") if is_time_to_send_personal(f, i, now_min)
+    ])
+    sql = bench("sql, epoch minutes (v3)", rows, lambda: db.execute(DUE_PERSONAL, (now_min,)).fetchall())
+    print(f"\nspeed-up: python {iso / ints:.1f}x, sql {iso / sql:.1f}x")
+
+    due_iso = {u for u, i, f in iso_rows if is_time_to_send_personal_iso(f, i, now)}
+    due_int = {u for (u,) in db.execute(DUE_PERSONAL, (now_min,))}
+    assert due_iso == due_int, "ISO and integer checks disagree"
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,49 @@
+"""
+Latency of a location → timezone lookup: a fresh TimezoneFinder per request (old handler),
+the shared warm finder, and the shared finder behind the coordinate grid cache.
+
+    python -m tools.bench_timezone_lookup [lookups]
+"""
+import random
+import statistics
+import sys
+import time
+
+from timezonefinder import TimezoneFinder
+
+from services.timezone_lookup import get_finder, lookup_cache_info, zone_at
+
+
+def report(label: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p50 = statistics.median(samples) * 1e3
+    p99 = samples[int(len(samples) * 0.99) - 1] * 1e3 if len(samples) >= 100 else samples[-1] * 1e3
+    print(f"{label:<30} n={len(samples):<6} p50={p50:9.3f} ms  p99={p99:9.3f} ms")
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main(lookups: int) -> None:
+    # Users cluster in cities: draw coordinates around a handful of centres
+    centres = [(52.52, 13.40), (55.75, 37.62), (40.71, -74.00), (51.51, -0.13), (35.68, 139.69), (-33.87, 151.21)]
+    points = [
+        (lat + random.uniform(-0.05, 0.05), lng + random.uniform(-0.05, 0.05))
+        for lat, lng in (random.choice(centres) for _ in range(lookups))
+    ]
+
+    cold = [timed(lambda p: TimezoneFinder().timezone_at(lat=p[0], lng=p[1]), p) for p in points[:10]]
+    report("cold (new finder per lookup)", cold)
+
+    report("shared finder, first load", [timed(get_finder)])
+    finder = get_finder()
+    report("shared finder, warm", [timed(lambda p: finder.timezone_at(lat=p[0], lng=p[1]), p) for p in points])
+    report("shared finder + grid cache", [timed(zone_at, *p) for p in points])
+    print(lookup_cache_info())
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
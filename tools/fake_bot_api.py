@@ -0,0 +1,271 @@
+"""
+Local stand-in for the Telegram Bot API (aiohttp) for end-to-end load tests on one machine.
+
+    python -m tools.fake_bot_api --port 8081 --latency 40 --jitter 20 --rate 30 --error-rate 0.01
+    BOT_API_BASE_URL=http://127.0.0.1:8081/bot python btc_price_bot.py
+
+Implements getMe, sendMessage, editMessageText, deleteMessage(s), sendInvoice, sendDocument,
+answerCallbackQuery and getUpdates (long polling); any other method answers `true`. Latency, 429 flood
+control (a global and a per-chat messages/second budget, answered with retry_after), random 403 "blocked"
+errors and random 502s are configurable. Every call is recorded.
+
+Control endpoints next to the Bot API:
+    POST   /fake/updates   queue one Update (or a list) for getUpdates; update_id is renumbered
+    GET    /fake/calls     recorded calls as JSON, ?method=sendMessage to filter
+    DELETE /fake/calls     clear the record
+    GET    /fake/stats     call and status counts per method
+
+In-process use (e.g. from a benchmark): `api = FakeBotApi(...); await api.start(host, port)`,
+then inspect `api.calls` / `api.calls_for("sendMessage")`.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+from collections import Counter, deque
+from dataclasses import asdict, dataclass
+
+from aiohttp import web
+
+# Sent by python-telegram-bot as plain strings; every other form value is JSON encoded
+STRING_PARAMS = frozenset({
+    "text", "caption", "title", "description", "payload", "provider_token", "currency", "start_parameter",
+    "callback_query_id", "parse_mode", "url", "secret_token", "inline_message_id",
+})
+MESSAGE_METHODS = frozenset({"sendMessage", "editMessageText", "sendInvoice", "sendDocument"})
+
+
+@dataclass(slots=True)
+class ApiCall:
+    method: str
+    params: dict
+    ts: float
+    status: int  # HTTP status the fake answered with
+
+
+class FakeBotApi:
+    """
+    Answers Bot API calls like Telegram would, with injected latency and failures.
+
+    Flood control is a sliding one-second window, globally (`rate`) and per chat (`chat_rate`),
+    applied to the message methods; 0 disables either.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate: float = 0, chat_rate: float = 0,
+                 retry_after: int = 1, error_rate: float = 0.0, server_error_rate: float = 0.0,
+                 seed: int | None = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate = rate
+        self.chat_rate = chat_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.server_error_rate = server_error_rate
+        self.calls: list[ApiCall] = []
+        self._rng = random.Random(seed)
+        self._message_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        self._recent: deque[float] = deque()  # timestamps of accepted messages (global window)
+        self._recent_by_chat: dict[int, deque[float]] = {}
+        self._updates: list[dict] = []
+        self._new_updates = asyncio.Condition()
+        self._runner: web.AppRunner | None = None
+
+        self.web_app = web.Application()
+        self.web_app.router.add_post("/fake/updates", self._handle_push_updates)
+        self.web_app.router.add_get("/fake/calls", self._handle_calls)
+        self.web_app.router.add_delete("/fake/calls", self._handle_clear_calls)
+        self.web_app.router.add_get("/fake/stats", self._handle_stats)
+        self.web_app.router.add_route("*", "/bot{token}/{method}", self._handle_method)
+
+    async def start(self, host: str, port: int) -> None:
+        self._runner = web.AppRunner(self.web_app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logging.info("🧪 Fake Bot API listening on http://%s:%s/bot", host, port)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def calls_for(self, method: str) -> list[ApiCall]:
+        return [call for call in self.calls if call.method == method]
+
+    def stats(self) -> dict[str, dict[int, int]]:
+        counts: dict[str, Counter] = {}
+        for call in self.calls:
+            counts.setdefault(call.method, Counter())[call.status] += 1
+        return {method: dict(statuses) for method, statuses in counts.items()}
+
+    async def push_update(self, update: dict) -> None:
+        update["update_id"] = next(self._update_ids)  # recorded updates may reuse ids; getUpdates needs them unique
+        async with self._new_updates:
+            self._updates.append(update)
+            self._new_updates.notify_all()
+
+    # --- Bot API ---
+
+    async def _handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._read_params(request)
+        if method != "getUpdates" and (self.latency or self.jitter):
+            await asyncio.sleep(max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter)))
+
+        status, body = self._injected_failure(method, params)
+        if status == 200:
+            body = {"ok": True, "result": await self._result(method, params)}
+        self.calls.append(ApiCall(method, params, time.time(), status))
+        return web.json_response(body, status=status)
+
+    def _injected_failure(self, method: str, params: dict) -> tuple[int, dict | None]:
+        if method not in MESSAGE_METHODS:
+            return 200, None
+        now = time.monotonic()
+        chat_id = params.get("chat_id")
+        if self._over_limit(self._recent, self.rate, now) or (
+            self.chat_rate and self._over_limit(self._recent_by_chat.setdefault(chat_id, deque()), self.chat_rate, now)
+        ):
+            return 429, {"ok": False, "error_code": 429, "description": f"Too Many Requests: retry after "
+                         f"{self.retry_after}", "parameters": {"retry_after": self.retry_after}}
+        if self._rng.random() < self.server_error_rate:
+            return 502, {"ok": False, "error_code": 502, "description": "Bad Gateway"}
+        if self._rng.random() < self.error_rate:
+            return 403, {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}
+        self._recent.append(now)
+        if self.chat_rate:
+            self._recent_by_chat[chat_id].append(now)
+        return 200, None
+
+    @staticmethod
+    def _over_limit(window: deque[float], rate: float, now: float) -> bool:
+        if not rate:
+            return False
+        while window and now - window[0] >= 1.0:
+            window.popleft()
+        return len(window) >= rate
+
+    async def _result(self, method: str, params: dict):
+        if method == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot",
+                    "can_join_groups": False, "can_read_all_group_messages": False, "supports_inline_queries": False}
+        if method == "getUpdates":
+            return await self._get_updates(params)
+        if method in MESSAGE_METHODS:
+            return self._message(method, params)
+        if method == "getWebhookInfo":
+            return {"url": "", "has_custom_certificate": False, "pending_update_count": len(self._updates)}
+        return True  # deleteMessage(s), answerCallbackQuery, setWebhook, deleteWebhook, setMyCommands, ...
+
+    def _message(self, method: str, params: dict) -> dict:
+        chat_id = params.get("chat_id", 0)
+        message = {
+            "message_id": params.get("message_id") or next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": 1, "is_bot": True, "first_name": "FakeBot"},
+        }
+        if method == "sendInvoice":
+            message["invoice"] = {key: params.get(key) for key in ("title", "description", "currency")}
+            message["invoice"]["start_parameter"] = params.get("start_parameter", "")
+            message["invoice"]["total_amount"] = sum(price.get("amount", 0) for price in params.get("prices", []))
+        elif method == "sendDocument":
+            file_id = f"doc{message['message_id']}"
+            message["document"] = {"file_id": file_id, "file_unique_id": file_id, "file_name": params.get("document")}
+        else:
+            message["text"] = params.get("text", "")
+        if "reply_markup" in params:
+            message["reply_markup"] = params["reply_markup"]
+        return message
+
+    async def _get_updates(self, params: dict) -> list[dict]:
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+        async with self._new_updates:
+            self._updates = [update for update in self._updates if update["update_id"] >= offset]  # confirmed
+            if not self._updates and timeout:
+                try:
+                    await asyncio.wait_for(self._new_updates.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return self._updates[:limit]
+
+    @staticmethod
+    async def _read_params(request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        params = {}
+        for key, value in (await request.post()).items():
+            if not isinstance(value, str):
+                params[key] = getattr(value, "filename", None)  # uploaded file – only its name is recorded
+            elif key in STRING_PARAMS:
+                params[key] = value
+            else:
+                try:
+                    params[key] = json.loads(value)
+                except ValueError:
+                    params[key] = value
+        return params
+
+    # --- control endpoints ---
+
+    async def _handle_push_updates(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        for update in payload if isinstance(payload, list) else [payload]:
+            await self.push_update(update)
+        return web.json_response({"queued": len(self._updates)})
+
+    async def _handle_calls(self, request: web.Request) -> web.Response:
+        method = request.query.get("method")
+        calls = self.calls_for(method) if method else self.calls
+        return web.json_response([asdict(call) for call in calls])
+
+    async def _handle_clear_calls(self, request: web.Request) -> web.Response:
+        self.calls.clear()
+        return web.json_response({"ok": True})
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+
+async def serve(args: argparse.Namespace) -> None:
+    api = FakeBotApi(
+        latency=args.latency / 1000, jitter=args.jitter / 1000, rate=args.rate, chat_rate=args.chat_rate,
+        retry_after=args.retry_after, error_rate=args.error_rate, server_error_rate=args.server_error_rate,
+        seed=args.seed,
+    )
+    await api.start(args.host, args.port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+        print(json.dumps(api.stats(), indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean response latency in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform +/- latency jitter in ms")
+    parser.add_argument("--rate", type=float, default=30, help="global messages/s before 429 (0 = unlimited)")
+    parser.add_argument("--chat-rate", type=float, default=1, help="per-chat messages/s before 429 (0 = unlimited)")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after seconds in 429 answers")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of messages answered 403 (blocked)")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="share of messages answered 502")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
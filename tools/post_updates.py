@@ -0,0 +1,94 @@
+"""
+Local test client for webhook mode: POSTs recorded Telegram updates to the bot's webhook and
+reports status codes and latency.
+
+    python -m tools.post_updates updates.jsonl --url http://127.0.0.1:8080/telegram --repeat 100
+    python -m tools.post_updates --text /price --user 12345      # synthetic message update
+
+Input is a JSON array or JSON lines of raw Update objects (e.g. saved getUpdates results).
+update_id values are renumbered so repeated sends are not treated as duplicates.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import time
+from collections import Counter
+
+import aiohttp
+
+from services.webhook import SECRET_HEADER
+
+
+def load_updates(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def synthetic_message(user_id: int, text: str) -> dict:
+    user = {"id": user_id, "is_bot": False, "first_name": "Test"}
+    message = {
+        "message_id": 1,
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private", "first_name": "Test"},
+        "from": user,
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": 1, "message": message}
+
+
+async def post_all(url: str, secret: str | None, updates: list[dict], repeat: int, concurrency: int) -> None:
+    headers = {SECRET_HEADER: secret} if secret else {}
+    update_ids = itertools.count(int(time.time()))
+    statuses: Counter[int] = Counter()
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def post(session: aiohttp.ClientSession, update: dict) -> None:
+        payload = {**update, "update_id": next(update_ids)}
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with session.post(url, json=payload, headers=headers) as response:
+                    statuses[response.status] += 1
+            except aiohttp.ClientError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(post(session, update) for _ in range(repeat) for update in updates))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"sent {len(latencies)} updates in {elapsed:.2f} s ({len(latencies) / elapsed:.0f}/s)")
+    print(f"status: {dict(statuses)}")
+    print(f"latency p50={statistics.median(latencies) * 1e3:.1f} ms  "
+          f"p99={latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1e3:.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", nargs="?", help="JSON array or JSON lines of Update objects")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{os.getenv('WEBHOOK_PORT', '8080')}"
+                                         f"{os.getenv('WEBHOOK_PATH', '/telegram')}")
+    parser.add_argument("--secret", default=os.getenv("WEBHOOK_SECRET"))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--user", type=int, default=1, help="user id for the synthetic update")
+    parser.add_argument("--text", default="/start", help="text of the synthetic update")
+    args = parser.parse_args()
+
+    updates = load_updates(args.file) if args.file else [synthetic_message(args.user, args.text)]
+    asyncio.run(post_all(args.url, args.secret, updates, args.repeat, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
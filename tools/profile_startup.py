@@ -0,0 +1,40 @@
+"""
+Offline startup profile for CI: times every import of btc_price_bot plus the storage init steps and
+handler registration against a throw-away database, then writes the report as JSON.
+No bot token or network access is needed (polling and the first price fetch are skipped).
+
+    python -m tools.profile_startup [report.json]
+"""
+import os
+import sys
+import tempfile
+
+os.environ["STARTUP_PROFILE"] = sys.argv[1] if len(sys.argv) > 1 else "startup_profile.json"
+
+from startup_profile import PROFILER  # noqa: E402  isort: skip – must precede the imports it times
+
+import asyncio  # noqa: E402
+import json  # noqa: E402
+
+with PROFILER.step("import btc_price_bot"):
+    import btc_price_bot  # noqa: E402
+
+import db.db  # noqa: E402
+import db.price_store  # noqa: E402
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.db.DB_NAME = os.path.join(tmp, "btc_bot_data.db")
+        db.price_store.PRICE_DB_NAME = os.path.join(tmp, "btc_price_history.db")
+        await btc_price_bot.init_storage()
+        with PROFILER.step("register handlers"):
+            btc_price_bot.build_application("123456:profile-only-token")
+        await db.price_store.shutdown_price_store()
+        await db.db.close_db()
+    report = PROFILER.finish()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
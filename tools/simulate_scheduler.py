@@ -0,0 +1,159 @@
+"""
+Replays a full day of scheduler ticks against a synthetic database and a fake Bot, as fast as possible,
+to size hardware for a given user count. Time is the frozen, hand-advanced CLOCK; every tick runs the real
+path – notify_subscribers (outbox enqueue) plus the drainer's send round through a BroadcastEngine
+without pacing – and reports per-tick latency percentiles, sends per tick and peak memory.
+
+    python -m tools.simulate_scheduler [--users N] [--ticks 1440] [--api-latency MS] [--tracemalloc]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import resource
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import db.db
+import handlers.price
+from clock import CLOCK
+from config import BROADCAST_WORKERS, CURRENCIES, PREDEFINED_INTERVALS
+from db.plan_index import epoch_minute
+from handlers.price import PriceCache
+from services.broadcast import BroadcastEngine
+from services.outbox import OutboxDrainer
+from services.scheduler import LAST_TICK_KEY, notify_subscribers
+from util import close_http_session
+
+BASE_WEIGHTS = (10, 10, 40, 25, 15)  # share of base plans per PREDEFINED_INTERVALS entry
+PERSONAL_INTERVALS = (15, 30, 60, 120, 180, 360, 720, 1440)
+ZONES = ("Europe/Moscow", "Europe/Berlin", "America/New_York", "America/Los_Angeles", "Asia/Shanghai",
+         "Asia/Kolkata", "Australia/Sydney", "America/Sao_Paulo")
+PRICES = {"usd": 97000.0, "rub": 8900000.0, "eur": 89000.0, "cad": 133000.0, "gbp": 76000.0, "cny": 700000.0}
+
+
+class FakeBot:
+    """Just enough of telegram.Bot for BroadcastEngine: counts sends, optionally sleeps like a real API call."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.sent = 0
+
+    async def send_message(self, chat_id: int, text: str, parse_mode: str | None = None) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent += 1
+
+
+def seed(path: str, users: int, start_min: int, rng: random.Random) -> dict[str, int]:
+    """Bulk-insert a plan/settings mix: ~60% base plans, ~25% personal plans, ~30% time settings."""
+    base, personal, tz, currencies = [], [], [], []
+    for user_id in range(1, users + 1):
+        if rng.random() < 0.6:
+            for interval in set(rng.choices(PREDEFINED_INTERVALS, BASE_WEIGHTS, k=rng.choice((1, 1, 2)))):
+                base.append((user_id, interval))
+        if rng.random() < 0.25:
+            for _ in range(rng.randint(1, 3)):
+                personal.append((user_id, rng.choice(PERSONAL_INTERVALS), start_min - rng.randint(0, 90 * 1440)))
+        if rng.random() < 0.3:
+            if rng.random() < 0.7:
+                tz.append((user_id, rng.choice(ZONES), 0, "location"))
+            else:
+                tz.append((user_id, None, rng.randrange(-720, 841, 30), "manual"))
+        if rng.random() < 0.4:
+            currencies.append((user_id, ",".join(rng.sample(CURRENCIES, rng.randint(1, 3)))))
+
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany("INSERT INTO base_subscribers (user_id, interval_minutes) VALUES (?, ?)", base)
+        conn.executemany(
+            "INSERT INTO personal_subscribers (user_id, interval_minutes, first_fire_min) VALUES (?, ?, ?)", personal
+        )
+        conn.executemany(
+            "INSERT INTO user_time_settings (user_id, timezone, offset_minutes, tz_method) VALUES (?, ?, ?, ?)", tz
+        )
+        conn.executemany("INSERT INTO currency_preferences (user_id, currencies) VALUES (?, ?)", currencies)
+    conn.close()
+    return {"base plans": len(base), "personal plans": len(personal), "time settings": len(tz),
+            "currency prefs": len(currencies)}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+async def simulate(args: argparse.Namespace, tmp: str) -> None:
+    rng = random.Random(args.seed)
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    start_min = epoch_minute(start)
+    CLOCK.freeze(start - timedelta(minutes=1))
+
+    db.db.DB_NAME = os.path.join(tmp, "simulation.db")
+    await db.db.init_db()
+    started = time.perf_counter()
+    counts = seed(db.db.DB_NAME, args.users, start_min, rng)
+    print(f"Seeded {args.users} users in {time.perf_counter() - started:.1f} s: "
+          + ", ".join(f"{count} {what}" for what, count in counts.items()))
+    await db.db.load_personal_plan_index()
+    await db.db.set_scheduler_state(LAST_TICK_KEY, start_min - 1)
+
+    bot = FakeBot(args.api_latency / 1000)
+    drainer = OutboxDrainer(engine=BroadcastEngine(workers=args.workers, rate=1e9, chat_interval=0))
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    latencies, sends = [], []
+    for _ in range(args.ticks):
+        CLOCK.advance(60)
+        handlers.price.PRICE_CACHE = PriceCache(PRICES, CLOCK.now())  # always fresh, never fetched
+        sent_before = bot.sent
+        tick_start = time.perf_counter()
+        await notify_subscribers(None)
+        while await drainer.drain_once(bot) >= drainer.batch_size:
+            pass
+        latencies.append(time.perf_counter() - tick_start)
+        sends.append(bot.sent - sent_before)
+    total = sum(latencies)
+
+    ordered = sorted(latencies)
+    busiest = max(range(len(sends)), key=sends.__getitem__)
+    print(f"\n{args.ticks} ticks in {total:.1f} s, {bot.sent} messages ({bot.sent / total:.0f} msg/s simulated)")
+    print("tick latency ms   " + "  ".join(
+        f"p{pct}={percentile(ordered, pct) * 1e3:.1f}" for pct in (50, 90, 99)
+    ) + f"  max={ordered[-1] * 1e3:.1f}")
+    print(f"sends per tick    mean={statistics.mean(sends):.1f}  max={sends[busiest]} "
+          f"(at {(start + timedelta(minutes=busiest)):%H:%M} UTC)  idle ticks={sends.count(0)}")
+    print(f"outbox            {drainer.stats()}")
+    if args.tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"peak Python heap  {peak / 2**20:.1f} MiB (tracemalloc)")
+    print(f"peak RSS          {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+    CLOCK.unfreeze()
+    await close_http_session()
+    await db.db.close_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--ticks", type=int, default=1440, help="simulated minutes (default: one day)")
+    parser.add_argument("--workers", type=int, default=BROADCAST_WORKERS)
+    parser.add_argument("--api-latency", type=float, default=0.0, help="fake send_message latency in ms")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tracemalloc", action="store_true", help="also track the Python heap peak (slower)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(simulate(args, tmp))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,10 @@ import functools
 import logging
 from collections import defaultdict
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional
-from urllib.parse import parse_qs
-from zoneinfo import ZoneInfo
+from typing import Collection, Dict, Optional
+from urllib.parse import parse_qs, urlparse
 
 import aiohttp
-from aiolimiter import AsyncLimiter
 from telegram import (
     Bot,
     InlineKeyboardMarkup,
@@ -19,12 +17,23 @@ from telegram import (
 )
 from telegram.ext import ConversationHandler
 
+from clock import CLOCK
 from config import CURRENCIES
-from db.db import get_user_timezone, load_user_currencies
+from db.db import (
+    DEFAULT_USER_PREFS,
+    get_user_timezone,
+    load_user_currencies,
+    load_user_preferences,
+)
+from metrics import HTTP_FETCH_ERRORS, METRICS
+from services.price_history import PRICE_HISTORY
+from services.rate_limit import UserRateLimiter
+from services.tz_offsets import UTC_OFFSETS, get_zone
 
 HTTP_SESSION: aiohttp.ClientSession | None = None
-USER_LIMIT = defaultdict(lambda: AsyncLimiter(1, 1))
-USER_BURST = defaultdict(lambda: AsyncLimiter(30, 60))
+CHANGE_WINDOWS = (("1h", 3600), ("24h", 86400))
+USER_LIMITER = UserRateLimiter((1, 1), (30, 60))  # 1 msg/s and 30 msg/min per user
+METRICS.callback("user_limiter_entries", "Users with live per-user rate limit state", lambda: len(USER_LIMITER))
 
 
 async def send_or_edit(update: Update, msg: str | None = None,
@@ -34,7 +43,7 @@ async def send_or_edit(update: Update, msg: str | None = None,
     Handles sending or editing a message depending on whether it was triggered by a button click or a command.
     """
     uid = update.effective_user.id
-    async with USER_LIMIT[uid], USER_BURST[uid]:
+    async with USER_LIMITER.limit(uid):
         is_reply_markup = isinstance(reply_markup, (ReplyKeyboardMarkup, ReplyKeyboardRemove))
 
         if update.callback_query and not is_reply_markup:
@@ -64,10 +73,13 @@ async def fetch_json(session: aiohttp.ClientSession, url: str) -> dict | None:
             response.raise_for_status()
             return await response.json()
     except aiohttp.ClientError as e:
+        HTTP_FETCH_ERRORS.labels(urlparse(url).netloc, type(e).__name__).inc()
         logging.error(f"API request failed: {url} | Error: {e}")
     except asyncio.TimeoutError:
+        HTTP_FETCH_ERRORS.labels(urlparse(url).netloc, "timeout").inc()
         logging.warning("Timeout (>%s s) while fetching %s – keeping old cache", 5, url)
     except Exception as e:
+        HTTP_FETCH_ERRORS.labels(urlparse(url).netloc, type(e).__name__).inc()
         logging.exception(f"Unexpected error in fetch_json({url}): {e}")
     return None
 
@@ -77,25 +89,81 @@ async def close_http_session():
         await HTTP_SESSION.close()
 
 
-async def format_price_message(price_data: dict, user_id: int) -> str:
+def render_price_message(price_data: dict, currencies: list[str], stamp: str,
+                         stale_age: float | None = None) -> str:
+    """
+    Builds the BTC price message body for a currency list and a ready-made timestamp.
+    stale_age (seconds) adds a warning that the quote is outdated.
+    """
+    now = CLOCK.time()
+    message = "📊 *Current Bitcoin (BTC) Prices:*\n"
+    for currency in currencies:
+        price = price_data.get(currency.lower())
+        if price is not None:
+            message += f"💰 *{currency.upper()}:* {price:,}{format_price_change(currency, price, now)}\n"
+    message += f"\n🕒 Last updated at: `{stamp}`"
+    if stale_age is not None:
+        message += f"\n⚠️ Price sources are unavailable – data is {int(stale_age // 60)} min old."
+    return message
+
+
+def format_price_change(currency: str, price: float, now: float) -> str:
+    """'  (1h +0.52%, 24h -1.30%)' from the in-memory price history; empty while history is too short."""
+    parts = []
+    for label, window in CHANGE_WINDOWS:
+        change = PRICE_HISTORY.change_pct(currency, price, window, now)
+        if change is not None:
+            parts.append(f"{label} {change:+.2f}%")
+    return f"  ({', '.join(parts)})" if parts else ""
+
+
+def effective_utc_offset(tz_data: Dict | None, utc_now: datetime) -> int | None:
+    """
+    User's UTC offset (minutes) at utc_now, or None when no time settings exist
+    (the message is then stamped in UTC).
+    """
+    return UTC_OFFSETS.effective_offset(tz_data, utc_now.timestamp())
+
+
+def format_stamp(utc_now: datetime, offset_minutes: int | None) -> str:
+    if offset_minutes is None:
+        return utc_now.strftime("%H:%M:%S UTC")
+    return (utc_now + timedelta(minutes=offset_minutes)).strftime("%H:%M:%S")
+
+
+async def format_price_message(price_data: dict, user_id: int, stale_age: float | None = None) -> str:
     """Formats the BTC price message with timestamp."""
     preferred = await load_user_currencies(user_id)
     currencies = preferred or CURRENCIES
 
-    message = "📊 *Current Bitcoin (BTC) Prices:*\n"
-    for currency in currencies:
-        if currency.lower() in price_data:
-            message += f"💰 *{currency.upper()}:* {price_data[currency.lower()]:,}\n"
-
-    utc_now = datetime.now(timezone.utc)
+    utc_now = CLOCK.now()
     tz_data = await get_user_timezone(user_id)
-    if tz_data and (tz_data.get("timezone") or tz_data.get("method")):
-        local_now = convert_utc_to_local(utc_now, tz_data)
-        stamp = local_now.strftime("%H:%M:%S")
-    else:
-        stamp = utc_now.strftime("%H:%M:%S UTC")
-    message += f"\n🕒 Last updated at: `{stamp}`"
-    return message
+    stamp = format_stamp(utc_now, effective_utc_offset(tz_data, utc_now))
+    return render_price_message(price_data, currencies, stamp, stale_age)
+
+
+async def format_price_messages(price_data: dict, user_ids: Collection[int],
+                                stale_age: float | None = None) -> dict[str, list[int]]:
+    """
+    Fan-out renderer for broadcasts: loads every recipient's settings in bulk, groups recipients
+    by (currency set, effective UTC offset) and renders each group's message once.
+    Returns {message: [user_id, ...]}.
+    """
+    utc_now = CLOCK.now()
+    prefs = await load_user_preferences(user_ids)
+    recipients = [(user_id, prefs.get(user_id, DEFAULT_USER_PREFS)) for user_id in user_ids]
+    offsets = UTC_OFFSETS.batch_offsets((user_prefs.tz_data for _, user_prefs in recipients), utc_now.timestamp())
+
+    groups: dict[tuple[tuple[str, ...], int | None], list[int]] = defaultdict(list)
+    for (user_id, user_prefs), offset in zip(recipients, offsets):
+        groups[(user_prefs.currencies or tuple(CURRENCIES), offset)].append(user_id)
+
+    stamps = {offset: format_stamp(utc_now, offset) for offset in set(offsets)}  # one strftime per offset
+    rendered: dict[str, list[int]] = {}
+    for (currencies, offset), members in groups.items():
+        text = render_price_message(price_data, list(currencies), stamps[offset], stale_age)
+        rendered.setdefault(text, []).extend(members)  # different keys may still render identically
+    return rendered
 
 
 async def safe_delete_message(bot: Bot, chat_id: int, msg_id: int, delay: float = 0):
@@ -127,10 +195,9 @@ def convert_local_to_utc(local_dt: datetime, tz_data: Dict) -> datetime:
     """Convert *naive* local_dt (user clock) → *naive* UTC datetime"""
     tz_name, offset, method = tz_data["timezone"], tz_data["offset_minutes"], tz_data["method"]
     if method == "location" and tz_name:
-        zone = ZoneInfo(tz_name)
         # Attach local zone, then convert to UTC
-        aware_local = local_dt.replace(tzinfo=zone)
-        return aware_local.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
+        aware_local = local_dt.replace(tzinfo=get_zone(tz_name))
+        return aware_local.astimezone(timezone.utc).replace(tzinfo=None)
     else:
         # manual or no-setting ⇒ fixed offset
         return local_dt - timedelta(minutes=offset)
@@ -140,9 +207,8 @@ def convert_utc_to_local(utc_dt: datetime, tz_data: Dict) -> datetime:
     """Convert *naive* UTC datetime → *naive* local datetime"""
     tz_name, offset, method = tz_data["timezone"], tz_data["offset_minutes"], tz_data["method"]
     if method == "location" and tz_name:
-        zone = ZoneInfo(tz_name)
-        aware_utc = utc_dt.replace(tzinfo=ZoneInfo("UTC"))
-        return aware_utc.astimezone(zone).replace(tzinfo=None)
+        aware_utc = utc_dt.replace(tzinfo=timezone.utc)
+        return aware_utc.astimezone(get_zone(tz_name)).replace(tzinfo=None)
     else:
         return utc_dt + timedelta(minutes=offset)
 